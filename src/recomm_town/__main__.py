@@ -9,10 +9,17 @@ parser.add_argument("town", type=Path)
 parser.add_argument("--match-time", type=int, default=600)
 parser.add_argument("--output", type=str, default="output.json")
 parser.add_argument("--fullscreen", action="store_true")
+parser.add_argument("--step", type=str, default="1/60")
+parser.add_argument("--max-substeps", type=int, default=8)
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument("--profile", type=str, default=None)
+parser.add_argument("--array-engine", action="store_true")
+parser.add_argument("--knowledge-matrix", action="store_true")
 
 
 if __name__ == "__main__":
     args = parser.parse_args()
+    from recomm_town.clock import parse_step
     from recomm_town.generic_main import run
 
     run(
@@ -20,4 +27,10 @@ if __name__ == "__main__":
         match_time=args.match_time,
         fullscreen=args.fullscreen,
         output_filename=args.output,
+        step=parse_step(args.step),
+        max_substeps=args.max_substeps,
+        seed=args.seed,
+        profile_filename=args.profile,
+        array_engine=args.array_engine,
+        knowledge_matrix=args.knowledge_matrix,
     )
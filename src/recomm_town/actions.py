@@ -1,5 +1,7 @@
-from typing import Callable, Literal
-from random import choice, choices, randint, random
+from collections.abc import Sequence
+from functools import cache
+from typing import Callable, Iterable, Literal
+from random import Random
 
 from recomm_town.common import Book, Trivia, TriviaChunk, Vec
 from recomm_town.town import Room, Place
@@ -59,27 +61,52 @@ class Move(Action):
         return "PASS"
 
 
-class UpdateLevelsInTime(Action):
+class MoveAlong(Action):
+    def __init__(self, points: Sequence[Vec], start: int = 0, end: int | None = None):
+        self.points = points
+        self.cursor = start
+        self.end = len(points) if end is None else end
+
+    def do_it(self, human: "Human", dt: float) -> T:
+        position = self.points[self.cursor]
+        diff = position - human.position
+        speed = human.info.speed * (dt * 60.0)
+        if diff.length() < speed * 2:
+            human.teleport(position.x, position.y)
+            self.cursor += 1
+            return "NEXT" if self.cursor == self.end else "PASS"
+
+        vec = diff.normalize() * speed
+        human.move(vec.x, vec.y)
+        return "PASS"
+
+
+class UpdateLevelsInTime(ActionWithStart):
+    # levels change at a steady rate for the whole time, Levels computes
+    # the current values when they are read
     def __init__(
         self,
         time: float,
         levels: dict[str, float],
         ratio: float = 1.0,
     ):
+        super().__init__(ratio * time)
         self.total_time = ratio * time
-        self.time = ratio * time
         self.levels = levels
         self.ratio = ratio
+        per_second = ratio / self.total_time if self.total_time else 0.0
+        self.rates = [(attr, value * per_second) for attr, value in levels.items()]
+        self.started = False
 
-    def do_it(self, human: "Human", dt: float) -> T:
-        self.time -= dt
-        if self.time <= 0.0:
-            return "NEXT"
-        ratio = self.ratio * dt / self.total_time
-        for attr, value in self.levels.items():
-            human.update_level(attr, value * ratio)
+    def on_start(self, human: Human) -> T:
+        self.started = True
+        human.start_level_rates(self.rates, self.total_time)
         return "PASS"
 
+    def on_destroy(self, human: Human):
+        if self.started:
+            human.stop_level_rates()
+
 
 class LearnTrivia(Action):
     def __init__(self, trivia: TriviaChunk, level: float, max_level: float):
@@ -116,37 +143,45 @@ class ChangeActivity(Action):
         return "NEXT"
 
 
+@cache
+def change_activity(activity: "Activity") -> ChangeActivity:
+    # stateless - one shared instance per activity for all plans
+    return ChangeActivity(activity)
+
+
 class RandomTalk(ActionWithStart):
     def __init__(
         self,
         time: float,
-        find_neighbours: Callable[[], list[Human]],
+        find_neighbours: Callable[[], Iterable[Human]],
+        rng: Random,
         probality: float = 0.75,
         teach_level: float = 0.1,
     ) -> None:
         super().__init__(time)
         self.find_neighbours = find_neighbours
+        self.rng = rng
         self.probality = probality
         self.teach_level = teach_level
         self.previous_activity = None
 
     def on_start(self, human: Human) -> T:
-        if random() >= self.probality:
+        rng = self.rng
+        if rng.random() >= self.probality:
             return "NEXT"
-        neighbours = list(self.find_neighbours())
-        neighbours.sort(key=human.get_trust_level, reverse=True)
-        for stranger in neighbours:
+        # lazy, already sorted by trust - the most trusted first
+        for stranger in self.find_neighbours():
             if stranger.activity != Activity.TALK:
                 continue
 
             self_trust = human.get_trust_level(stranger)
             stranger_trust = stranger.get_trust_level(human)
             trust = (self_trust + stranger_trust) / 2.0
-            if random() < trust:
+            if rng.random() < trust:
                 continue
 
             if stranger.knowledge and human.knowledge:
-                if random() > 0.5:
+                if rng.random() > 0.5:
                     return self._share(stranger, human)
                 else:
                     return self._share(human, stranger)
@@ -162,22 +197,22 @@ class RandomTalk(ActionWithStart):
     def _share(self, teacher: Human, student: Human):
         trivia = self._choice_trivia(teacher)
 
-        chunk_id = choice(list(teacher.knowledge[trivia].keys()))
+        rng = self.rng
+        chunk_id = rng.choice(list(teacher.knowledge[trivia].keys()))
         trivia_chunk = trivia.get_chunk(chunk_id)
 
-        time_to_share = randint(2, 5)
-        teach_level = self.teach_level * (0.4 + random() * 0.6)
+        time_to_share = rng.randint(2, 5)
+        teach_level = self.teach_level * (0.4 + rng.random() * 0.6)
         teacher.replace_first_action(
-            ShareTo(time_to_share, trivia_chunk, teach_level / 10, student)
+            ShareTo(time_to_share, trivia_chunk, teach_level / 10, student, rng)
         )
         student.replace_first_action(
-            ShareFrom(time_to_share, trivia_chunk, teach_level, teacher)
+            ShareFrom(time_to_share, trivia_chunk, teach_level, teacher, rng)
         )
         teacher.start_talk(student, trivia)
         return "STOP"
 
-    @staticmethod
-    def _choice_trivia(teacher: Human) -> Trivia:
+    def _choice_trivia(self, teacher: Human) -> Trivia:
         available_trivias = list(teacher.knowledge.keys())
         if (place := teacher.current_place) is not None:
             talk_trivias = place.talk_trivias
@@ -189,7 +224,7 @@ class RandomTalk(ActionWithStart):
         else:
             trivia_weights = [trivia.popularity for trivia in available_trivias]
 
-        return choices(available_trivias, trivia_weights)[0]
+        return self.rng.choices(available_trivias, trivia_weights)[0]
 
     def on_destroy(self, human: Human):
         if self.previous_activity is not None:
@@ -202,12 +237,14 @@ class Share(ActionWithStart):
         time: float,
         other: Human,
         trivia: TriviaChunk,
+        rng: Random,
         level: float = 0.2,
         max: float = 1.0,
     ) -> None:
         super().__init__(time)
         self.other = other
         self.trivia = trivia
+        self.rng = rng
         self.level = level
         self.max = max
 
@@ -219,22 +256,34 @@ class Share(ActionWithStart):
     def on_destroy(self, human: Human):
         human.update_activity(self.previous_activity)
         human.update_knowledge(self.trivia, self.level, self.max)
-        human.update_friend_level(self.other, random() * 0.2)
+        human.update_friend_level(self.other, self.rng.random() * 0.2)
 
 
 class ShareFrom(Share):
     def __init__(
-        self, time: float, trivia: TriviaChunk, teach_level: float, teacher: Human
+        self,
+        time: float,
+        trivia: TriviaChunk,
+        teach_level: float,
+        teacher: Human,
+        rng: Random,
     ):
         teacher_level = teacher.knowledge[trivia.trivia][trivia.id]
-        super().__init__(time, teacher, trivia, level=teach_level, max=teacher_level)
+        super().__init__(
+            time, teacher, trivia, rng, level=teach_level, max=teacher_level
+        )
 
 
 class ShareTo(Share):
     def __init__(
-        self, time: float, trivia: TriviaChunk, teach_level: float, student: Human
+        self,
+        time: float,
+        trivia: TriviaChunk,
+        teach_level: float,
+        student: Human,
+        rng: Random,
     ):
-        super().__init__(time, student, trivia, level=teach_level, max=1.0)
+        super().__init__(time, student, trivia, rng, level=teach_level, max=1.0)
         self.student = student
 
     def on_destroy(self, human: Human):
@@ -261,15 +310,16 @@ class TakeRoom(Action):
 
     def do_it(self, human: "Human", dt: float) -> T:
         human.set_place(self.place, self.room)
-        self.room.occupied_by = human
+        self.place.take_room(self.room, human)
         return "NEXT"
 
 
 class FreeRoom(Action):
-    def __init__(self, room: Room) -> None:
+    def __init__(self, place: Place, room: Room) -> None:
+        self.place = place
         self.room = room
 
     def do_it(self, human: "Human", dt: float) -> T:
         human.unset_place()
-        self.room.occupied_by = None
+        self.place.free_room(self.room)
         return "NEXT"
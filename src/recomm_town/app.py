@@ -79,6 +79,7 @@ class App(Window):
         self.tracked_human = None
         self.match_time = match_time
         self.idle_action_time = IDLE_TIME
+        self.elapsed_seconds = 0
 
         self.human_observers: Observer[Human | None] = Observer()
         self.time_observers: Observer[int] = Observer()
@@ -150,10 +151,9 @@ class App(Window):
             group.visible = False
 
     def run(self):
-        pyglet.clock.schedule_interval(self.tick_second, 1)
         pyglet.app.run()
 
-    def tick_second(self, dt):
+    def tick_second(self):
         self.match_time -= 1
         self.idle_action_time -= 1
         self.time_observers(self.match_time)
@@ -324,6 +324,12 @@ class App(Window):
         self.recreate_view()
 
     def on_draw(self):
+        if self.world.profiler is not None:
+            self.world.profiler.measure("draw", self._draw)
+        else:
+            self._draw()
+
+    def _draw(self):
         self.clear()
         # 0x97BFA5
         gl.glClearColor(0x1a / 255, 0x80 / 255, 0x1a / 255, 1.0)
@@ -345,6 +351,11 @@ class App(Window):
             self.dispatch_event(event)
 
         self.world.do_it(dt)
+        seconds = int(self.world.clock.time)
+        while self.elapsed_seconds < seconds:
+            self.elapsed_seconds += 1
+            self.tick_second()
+
         if getattr(self.people_group, "cell_changed", False):
             self.people_group.cell_changed = False
             human_groups = self.batch.group_children.get(self.people_group, [])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Iterator
+
+from recomm_town.clock import parse_step
+from recomm_town import headless
+
+
+@dataclass
+class BatchJob:
+    town: Path
+    seed: int
+    output: Path
+    levels: dict[str, float] = field(default_factory=dict)
+
+
+def parse_levels(value: str) -> dict[str, float]:
+    levels = {}
+    for pair in value.split(","):
+        key, _, raw_value = pair.partition("=")
+        levels[key.strip().replace("-", "_")] = float(raw_value)
+    return levels
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("towns", type=Path, nargs="+")
+parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+parser.add_argument("--levels", type=parse_levels, action="append", default=[])
+parser.add_argument("--sim-seconds", type=float, default=600.0)
+parser.add_argument("--dt", type=parse_step, default=1 / 60)
+parser.add_argument("--output-dir", type=Path, default=Path("results"))
+parser.add_argument("--workers", type=int, default=os.cpu_count())
+
+
+def make_jobs(
+    towns: list[Path],
+    seeds: list[int],
+    variants: list[dict[str, float]],
+    output_dir: Path,
+) -> list[BatchJob]:
+    return [
+        BatchJob(
+            town=town,
+            seed=seed,
+            output=output_dir / f"{town.stem}_seed{seed}_v{index}.json",
+            levels=levels,
+        )
+        for town, seed, (index, levels) in product(
+            towns, seeds, enumerate(variants or [{}])
+        )
+    ]
+
+
+def write_manifest(jobs: list[BatchJob], output_dir: Path):
+    manifest = [
+        {
+            "town": str(job.town),
+            "seed": job.seed,
+            "levels": job.levels,
+            "output": job.output.name,
+        }
+        for job in jobs
+    ]
+    with open(output_dir / "manifest.json", "w") as file:
+        json.dump(manifest, file, indent=2)
+
+
+def run_batch(
+    jobs: list[BatchJob],
+    sim_seconds: float,
+    dt: float,
+    workers: int | None = None,
+) -> Iterator[BatchJob]:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_job, job, sim_seconds, dt) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _run_job(job: BatchJob, sim_seconds: float, dt: float) -> BatchJob:
+    headless.run(
+        town=job.town,
+        sim_seconds=sim_seconds,
+        dt=dt,
+        output_filename=str(job.output),
+        seed=job.seed,
+        levels=job.levels,
+    )
+    return job
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = make_jobs(args.towns, args.seeds, args.levels, args.output_dir)
+    write_manifest(jobs, args.output_dir)
+    for done, job in enumerate(
+        run_batch(jobs, args.sim_seconds, args.dt, args.workers), start=1
+    ):
+        print(f"[{done}/{len(jobs)}] {job.output}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, sqrt
+from random import Random
+
+from recomm_town.clock import SimulationClock, parse_step
+from recomm_town.common import Trivia, Vec
+from recomm_town.creator.people_factory import AvailablePlaces, generate_people
+from recomm_town.creator.room_factories import RoomFactories
+from recomm_town.engine import ArrayEngine
+from recomm_town.knowledge import KnowledgeDecay, KnowledgeMatrix, TriviaIndex
+from recomm_town.program import Program
+from recomm_town.town import Place, PlaceFunction, Town
+from recomm_town.world import World, WorldLevels
+
+FLAT_WIDTH = 5
+FLAT_HEIGHT = 4
+WORKERS_PER_WORKPLACE = 80
+PLACE_SPACING = 1500.0
+
+TRIVIAS = [Trivia("bench", f"trivia {i}") for i in range(8)]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+parser.add_argument("--ticks", type=int, default=100)
+parser.add_argument("--warmup-ticks", type=int, default=10)
+parser.add_argument("--alloc-ticks", type=int, default=10)
+parser.add_argument("--dt", type=parse_step, default=1 / 60)
+parser.add_argument("--connections", type=int, default=0)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--array-engine", action="store_true")
+knowledge_group = parser.add_mutually_exclusive_group()
+knowledge_group.add_argument("--knowledge-matrix", action="store_true")
+knowledge_group.add_argument("--lazy-forgetting", action="store_true")
+parser.add_argument("--output", type=str, default="benchmark.json")
+
+
+def make_places(people: int, rng: Random, connections: int = 0) -> list[Place]:
+    rooms_per_home = 2 * FLAT_WIDTH * FLAT_HEIGHT
+    homes = ceil(people / rooms_per_home)
+    workplaces = ceil(homes * rooms_per_home / WORKERS_PER_WORKPLACE)
+    others = max(1, homes // 10)
+    work_rows = ceil(WORKERS_PER_WORKPLACE / (2 * FLAT_WIDTH))
+
+    kinds = (
+        [(PlaceFunction.HOME, (FLAT_WIDTH, FLAT_HEIGHT))] * homes
+        + [(PlaceFunction.WORK, (FLAT_WIDTH, work_rows))] * workplaces
+        + [(PlaceFunction.SHOP, (2, 2))] * others
+        + [(PlaceFunction.ENTERTAIMENT, (2, 2))] * others
+    )
+    rng.shuffle(kinds)
+
+    side = ceil(sqrt(len(kinds)))
+    lattice: dict[tuple[int, int], Place] = {}
+    for index, (function, flat) in enumerate(kinds):
+        x, y = index % side, index // side
+        lattice[x, y] = Place(
+            name=f"{function.name.lower()}-{x}-{y}",
+            title=f"{function.name.title()} {x}x{y}",
+            position=Vec(x * PLACE_SPACING, y * PLACE_SPACING),
+            function=function,
+            rooms=RoomFactories.flat(*flat),
+            learn_trivias=TRIVIAS if function == PlaceFunction.WORK else None,
+            talk_trivias=TRIVIAS if function == PlaceFunction.WORK else None,
+        )
+
+    places = list(lattice.values())
+    for (x, y), place in lattice.items():
+        place.connect(
+            *(p for p in (lattice.get((x + 1, y)), lattice.get((x, y + 1))) if p)
+        )
+        for _ in range(connections):
+            other = rng.choice(places)
+            if other is not place:
+                place.connect(other)
+    return places
+
+
+def make_world(people: int, dt: float, seed: int, connections: int = 0) -> World:
+    rng = Random(seed)
+    places = make_places(people, rng, connections)
+    town = Town(places)
+    homes = {p for p in places if p.function == PlaceFunction.HOME}
+    workplaces = {p for p in places if p.function == PlaceFunction.WORK}
+    humans = generate_people(
+        houses=homes,
+        available_workplaces=AvailablePlaces.create(workplaces),
+        available_comms=AvailablePlaces([]),
+        books=None,
+        rng=rng,
+    )
+    return World(
+        town=town,
+        invites=[],
+        people=humans,
+        radio_program=Program(TRIVIAS, 30.0, 0.0, rng),
+        tv_program=Program(TRIVIAS, 15.0, 0.0, rng),
+        levels=WorldLevels(),
+        clock=SimulationClock(step=dt),
+        rng=rng,
+    )
+
+
+def bench(
+    people: int,
+    ticks: int,
+    warmup_ticks: int,
+    alloc_ticks: int,
+    dt: float,
+    seed: int,
+    connections: int,
+    array_engine: bool = False,
+    knowledge_matrix: bool = False,
+    lazy_forgetting: bool = False,
+) -> dict:
+    result: dict = {"people": people}
+    try:
+        _bench(
+            result,
+            people,
+            ticks,
+            warmup_ticks,
+            alloc_ticks,
+            dt,
+            seed,
+            connections,
+            array_engine,
+            knowledge_matrix,
+            lazy_forgetting,
+        )
+    except (RecursionError, RuntimeError) as e:
+        # big towns may not build or route at all - still worth a line in the report.
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _bench(
+    result: dict,
+    people: int,
+    ticks: int,
+    warmup_ticks: int,
+    alloc_ticks: int,
+    dt: float,
+    seed: int,
+    connections: int,
+    array_engine: bool,
+    knowledge_matrix: bool,
+    lazy_forgetting: bool,
+):
+    start = time.perf_counter()
+    world = make_world(people, dt, seed, connections)
+    if array_engine:
+        world.engine = ArrayEngine(world.people)
+    if knowledge_matrix:
+        world.knowledge = KnowledgeMatrix(TriviaIndex(TRIVIAS), world.people)
+    if lazy_forgetting:
+        world.knowledge_decay = KnowledgeDecay(
+            world.clock, world.levels.forgetting_factor, world.people
+        )
+    result["build_seconds"] = time.perf_counter() - start
+    result["people"] = len(world.people)
+    result["places"] = len(world.town.places)
+
+    step = world.step
+    for _ in range(warmup_ticks):
+        step(dt)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        step(dt)
+    elapsed = time.perf_counter() - start
+    result["ticks"] = ticks
+    result["ticks_per_second"] = ticks / elapsed
+    result["us_per_human_tick"] = elapsed / ticks / len(world.people) * 1e6
+
+    # traced separately - tracemalloc slows everything down.
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    for _ in range(alloc_ticks):
+        step(dt)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    net_blocks = sys.getallocatedblocks() - blocks
+    result["alloc_peak_kib"] = peak / 1024
+    result["alloc_net_blocks_per_tick"] = net_blocks / max(alloc_ticks, 1)
+    result["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = []
+    for people in args.sizes:
+        # fresh process per size - keeps peak RSS of the previous size out.
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                bench,
+                people,
+                args.ticks,
+                args.warmup_ticks,
+                args.alloc_ticks,
+                args.dt,
+                args.seed,
+                args.connections,
+                args.array_engine,
+                args.knowledge_matrix,
+                args.lazy_forgetting,
+            )
+            result = future.result()
+        results.append(result)
+        print(_format(result), flush=True)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "args": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+
+
+def _format(result: dict) -> str:
+    if "error" in result:
+        return f"{result['people']:>8} people: {result['error']}"
+    return (
+        f"{result['people']:>8} people {result['places']:>5} places:"
+        f" build {result['build_seconds']:8.3f}s"
+        f" {result['ticks_per_second']:9.2f} ticks/s"
+        f" {result['us_per_human_tick']:7.2f} us/human"
+        f" {result['peak_rss_kib'] / 1024:8.1f} MiB RSS"
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    report = run(args)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
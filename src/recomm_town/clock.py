@@ -0,0 +1,40 @@
+from fractions import Fraction
+from typing import Iterator
+
+
+class SimulationClock:
+    step: float
+    max_substeps: int
+    ticks: int
+    _accumulator: float
+
+    def __init__(self, step: float = 1 / 60, max_substeps: int = 8):
+        assert step > 0.0
+        assert max_substeps > 0
+        self.step = step
+        self.max_substeps = max_substeps
+        self.ticks = 0
+        self._accumulator = 0.0
+
+    @property
+    def time(self) -> float:
+        return self.ticks * self.step
+
+    def tick(self):
+        # one simulation step done - called by World.step, also when it is
+        # driven directly without steps()
+        self.ticks += 1
+
+    def steps(self, dt: float) -> Iterator[float]:
+        self._accumulator += dt
+        for _ in range(self.max_substeps):
+            if self._accumulator < self.step:
+                return
+            self._accumulator -= self.step
+            yield self.step
+        # too slow to catch up - drop the backlog instead of spiraling.
+        self._accumulator = min(self._accumulator, self.step)
+
+
+def parse_step(value: str) -> float:
+    return float(Fraction(value))
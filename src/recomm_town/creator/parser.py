@@ -1,12 +1,14 @@
 from itertools import chain
 from pathlib import Path
-from random import choices, shuffle
+from random import Random
 import os
 import re
 import yaml
 
+from recomm_town.clock import SimulationClock
 from recomm_town.common import Book, Trivia, Vec
 from recomm_town.human import Human
+from recomm_town.knowledge import TriviaIndex
 from recomm_town.program import Program
 from recomm_town.town import Town, Place, PlaceFunction, LocalRoom
 from recomm_town.town.place import Invite
@@ -19,12 +21,14 @@ TOWNS = Path(os.environ["ASSETS"]) / "towns"
 
 class WorldParser:
 
-    def __init__(self, path: Path | str):
+    def __init__(self, path: Path | str, rng: Random | None = None):
         self.path = Path(path)
+        self.rng = rng or Random()
         self.places: dict[str, set[Place]] = {}
         self.invites: dict[str, set[Invite]] = {}
         self.place_positions: dict[str, Vec] = {}
         self.trivias: dict[str, list[Trivia]] = {}
+        self.trivia_index = TriviaIndex()
         self.people: list[Human] = []
         if not self.path.exists():
             self.path = TOWNS / self.path
@@ -81,12 +85,21 @@ class WorldParser:
             )
         )
 
-    def create_world(self) -> World:
-        shuffle(self.people)
-        places = list(set(chain.from_iterable(self.places.values())))
-        invites = list(set(chain.from_iterable(self.invites.values())))
-        shuffle(invites)
-        shuffle(places)
+    def create_world(
+        self,
+        clock: SimulationClock | None = None,
+        levels: WorldLevels | None = None,
+    ) -> World:
+        rng = self.rng
+        rng.shuffle(self.people)
+        # sorted first - set order depends on the string hash seed
+        places = sorted(set(chain.from_iterable(self.places.values())))
+        invites = sorted(
+            set(chain.from_iterable(self.invites.values())),
+            key=lambda invite: invite.place,
+        )
+        rng.shuffle(invites)
+        rng.shuffle(places)
 
         return World(
             town=Town(places),
@@ -94,14 +107,16 @@ class WorldParser:
             people=self.people,
             tv_program=self.tv_program,
             radio_program=self.radio_program,
-            levels=self.levels,
+            levels=levels or self.levels,
+            clock=clock,
+            rng=rng,
         )
 
     def _load_program(self, program) -> Program:
         trivias = self._find_trivias(program.get("program")) or []
         lifetime = program.get("lifetime", 15)
         start_after = program.get("start-after", 0.0)
-        return Program(trivias, lifetime, start_after)
+        return Program(trivias, lifetime, start_after, self.rng)
 
     def _load_trivias(self, trivia_path: Path):
         with open(trivia_path) as file:
@@ -124,8 +139,11 @@ class WorldParser:
                 raw_trivias = category["trivias"]
                 choice = category.get("choice")
                 if choice is not None:
-                    raw_trivias = choices(raw_trivias, k=choice)
-                group += [Trivia(name=name, **args) for name in raw_trivias]
+                    raw_trivias = self.rng.choices(raw_trivias, k=choice)
+                for name in raw_trivias:
+                    trivia = Trivia(name=name, **args)
+                    self.trivia_index.intern(trivia)
+                    group.append(trivia)
 
             self.trivias[group_name] = group
 
@@ -184,6 +202,7 @@ class WorldParser:
             place=place,
             period=invite_period,
             priority=new_params.get("invite-priority", Invite.priority),
+            rng=self.rng,
         )
 
     def _create_place(self, name, params) -> Place:
@@ -270,6 +289,7 @@ class WorldParser:
             available_workplaces=available_workplaces.extract(jobs),
             available_comms=available_comms.extract(comms),
             books=self._find_books(config.get("books")),
+            rng=self.rng,
         )
 
     def _find_places(self, obj: str | list[str]) -> set[Place]:
@@ -1,5 +1,5 @@
 from itertools import product
-from random import choice, choices, randint, random, shuffle
+from random import Random
 from dataclasses import dataclass
 from typing import Iterable
 
@@ -12,9 +12,9 @@ consonants = "tpsdhjklmn"
 syllabes = [c + v for c, v in product(consonants, vowels)]
 
 
-def make_name() -> str:
-    length = randint(2, 4)
-    return "".join(choice(syllabes) for _ in range(length)).title()
+def make_name(rng: Random) -> str:
+    length = rng.randint(2, 4)
+    return "".join(rng.choice(syllabes) for _ in range(length)).title()
 
 
 @dataclass
@@ -27,7 +27,7 @@ class AvailablePlaces:
 
     @classmethod
     def create(cls, jobs: set[Place]):
-        return cls(AvailablePlace(p, len(p.rooms)) for p in jobs)
+        return cls(AvailablePlace(p, len(p.rooms)) for p in sorted(jobs))
 
     def __init__(self, places: Iterable[AvailablePlace]) -> None:
         self.places = list(places)
@@ -36,10 +36,10 @@ class AvailablePlaces:
         cls = type(self)
         return cls(p for p in self.places if p.place in jobs and p.jobs > 0)
 
-    def find(self) -> Place | None:
+    def find(self, rng: Random) -> Place | None:
         if not self.places:
             return None
-        available_workspaces = choices(
+        available_workspaces = rng.choices(
             self.places,
             weights=[w.jobs for w in self.places],
         )
@@ -56,44 +56,45 @@ def generate_people(
     available_workplaces: AvailablePlaces,
     available_comms: AvailablePlaces,
     books,
+    rng: Random,
 ) -> list[Human]:
     people = []
-    for home in houses:
+    for home in sorted(houses):
         family = []
         for room in home.rooms:
-            workplace = available_workplaces.find()
+            workplace = available_workplaces.find(rng)
             if workplace is None:
                 raise RuntimeError("No jobs here.")
-            human = _generate_human(home, room, workplace)
+            human = _generate_human(home, room, workplace, rng)
             _push_human_into_members(
                 human,
-                [workplace, available_comms.find()],
+                [workplace, available_comms.find(rng)],
             )
-            if books and random() > 0.7:
-                human.library.append(choice(books))
-            room.occupied_by = human
+            if books and rng.random() > 0.7:
+                human.library.append(rng.choice(books))
+            home.take_room(room, human)
             family.append(human)
-        _update_family_friendness(family)
+        _update_family_friendness(family, rng)
         people += family
 
-    shuffle(people)  # for random selecting people
+    rng.shuffle(people)  # for random selecting people
     return people
 
 
-def _generate_human(liveplace: Place, liveroom: Room, workplace: Place):
+def _generate_human(liveplace: Place, liveroom: Room, workplace: Place, rng: Random):
     info = HumanInfo(
-        name=make_name(),
+        name=make_name(rng),
         liveplace=liveplace,
         liveroom=liveroom,
         workplace=workplace,
-        speed=5.0 + random() * 5.0,
-        stranger_trust_level=0.2 + random() * 0.1,
+        speed=5.0 + rng.random() * 5.0,
+        stranger_trust_level=0.2 + rng.random() * 0.1,
     )
     human = Human(info.liveroom.position, info)
-    human.levels.money += random()
-    human.levels.energy -= random() * 0.5
-    human.levels.satiety -= random() * 0.3
-    human.levels.fridge -= random() * 0.5
+    human.levels.add("money", rng.random())
+    human.levels.add("energy", -rng.random() * 0.5)
+    human.levels.add("satiety", -rng.random() * 0.3)
+    human.levels.add("fridge", -rng.random() * 0.5)
     return human
 
 
@@ -104,10 +105,10 @@ def _push_human_into_members(human: Human, places: list[Place | None]):
         place.members.append(human)
 
 
-def _update_family_friendness(family: list[Human]):
+def _update_family_friendness(family: list[Human], rng: Random):
     for a in family:
         for b in family:
             if a is b:
                 continue
-            a.update_friend_level(b, value=random() * 0.5)
-            b.update_friend_level(b, value=random() * 0.5)
+            a.update_friend_level(b, value=rng.random() * 0.5)
+            b.update_friend_level(b, value=rng.random() * 0.5)
@@ -1,7 +1,8 @@
 from collections import defaultdict
 from itertools import cycle
 from math import atan2, degrees
-from random import randint, random
+from random import Random
+from typing import Callable
 
 from pyglet.graphics import Batch, Group
 from pyglet.image import Texture
@@ -24,7 +25,8 @@ from recomm_town.shaders import AnimatedLine, Sprite
 from recomm_town.shaders.curve_line import CurveLine
 from recomm_town.shaders.human_group import HumanGroup
 from recomm_town.common import Trivia, Vec
-from recomm_town.human import Human
+from recomm_town.human import Activity, Human
+from recomm_town.profiler import TickProfiler
 from recomm_town.shaders.rounded_rectangle import RoundedRectangle
 from recomm_town.town.place import Place, Way
 
@@ -54,8 +56,10 @@ class Draw:
         gui_group: GuiGroup,
         width: int,
         height: int,
+        rng: Random,
     ) -> None:
         self.objs = []
+        self.rng = rng
         self.batch = batch
         self.gui_group = gui_group
         self.kw = dict(batch=batch)
@@ -67,12 +71,13 @@ class Draw:
         )
         self.people_group = people_group
         self.trivias_level = defaultdict(float)
+        self.trivia_levels: Callable[[], dict[Trivia, float]] | None = None
         self.tracked_human: TrackHumanDraw | None = None
         self.lifeobjs = {}
         self.screen_width = width
         self.screen_height = height
 
-    def draw_gui(self, match_time):
+    def draw_gui(self, match_time, profiler: TickProfiler | None = None):
         kw = dict(**self.kw, group=self.gui_group)
         self.trivia_dashboard = Label(
             multiline=True,
@@ -110,6 +115,103 @@ class Draw:
                 **kw,
             ),
         ]
+        if profiler is not None:
+            self.draw_profiler(profiler)
+
+    def draw_profiler(self, profiler: TickProfiler):
+        kw = dict(**self.kw, group=self.gui_group)
+        self.profiler = profiler
+        self.profiler_panel = Label(
+            multiline=True,
+            width=600.0,
+            x=30.0,
+            y=-530.0,
+            color=DASHBOARD_WHITE,
+            **DASHBOARD_FONTS.TEXT,
+            **kw,
+        )
+        self.objs += [
+            RoundedRectangle(
+                x=10.0,
+                y=-700.0,
+                width=650.0,
+                height=200.0,
+                round=4,
+                color=DASHBOARD_BG,
+                **kw,
+            ),
+        ]
+
+    def update_profiler(self, match_time: int):
+        self.profiler_panel.text = self.profiler.summary()
+
+    def draw_activities(self, histogram: Callable[[], dict[Activity, int]]):
+        kw = dict(**self.kw, group=self.gui_group)
+        self.activity_histogram = histogram
+        self.activity_panel = Label(
+            multiline=True,
+            width=600.0,
+            x=30.0,
+            y=-340.0,
+            color=DASHBOARD_WHITE,
+            **DASHBOARD_FONTS.TEXT,
+            **kw,
+        )
+        self.objs += [
+            RoundedRectangle(
+                x=10.0,
+                y=-410.0,
+                width=650.0,
+                height=90.0,
+                round=4,
+                color=DASHBOARD_BG,
+                **kw,
+            ),
+        ]
+        self.update_activities(0)
+
+    def update_activities(self, match_time: int):
+        histogram = self.activity_histogram()
+        counts = sorted(((n, a) for a, n in histogram.items()), reverse=True)
+        self.activity_panel.text = ",  ".join(
+            f"{ACTIVITY_CFG[activity].label} {count}"
+            for count, activity in counts
+            if count
+        )
+
+    def draw_occupancy(self, places: list[Place]):
+        kw = dict(**self.kw, group=self.gui_group)
+        self.occupancy_places = [place for place in places if place.rooms]
+        self.occupancy_panel = Label(
+            multiline=True,
+            width=600.0,
+            x=30.0,
+            y=-440.0,
+            color=DASHBOARD_WHITE,
+            **DASHBOARD_FONTS.TEXT,
+            **kw,
+        )
+        self.objs += [
+            RoundedRectangle(
+                x=10.0,
+                y=-490.0,
+                width=650.0,
+                height=70.0,
+                round=4,
+                color=DASHBOARD_BG,
+                **kw,
+            ),
+        ]
+        self.update_occupancy(0)
+
+    def update_occupancy(self, match_time: int):
+        places = self.occupancy_places
+        taken = sum(place.occupied_rooms for place in places)
+        rooms = sum(len(place.rooms) for place in places)
+        full = sum(1 for place in places if place.is_full)
+        self.occupancy_panel.text = (
+            f"Rooms taken {taken} / {rooms},  full places {full} / {len(places)}"
+        )
 
     def on_resize(self, width: int, height: int):
         self.screen_width = width
@@ -136,19 +238,23 @@ class Draw:
             for i in range(len(way.points) - 1):
                 a = way.points[i]
                 b = way.points[i + 1]
-                color = COLORS.way_a.mix(COLORS.way_b, random()).to_pyglet()
+                mix = self.rng.random()
+                color = COLORS.way_a.mix(COLORS.way_b, mix).to_pyglet()
                 self.objs.append(Line(a.x, a.y, b.x, b.y, color=color, **kw))
 
     def draw_blobs(self, boundaries, group: Group):
         start = boundaries[0]
         diff = boundaries[1] - boundaries[0]
         kw = dict(**self.kw, group=group)
+        rng = self.rng
         for i in range(20):
-            position = Vec(start.x + random() * diff.x, start.y + random() * diff.y)
-            half_size = 256.0 + random() * 256.0
+            position = Vec(
+                start.x + rng.random() * diff.x, start.y + rng.random() * diff.y
+            )
+            half_size = 256.0 + rng.random() * 256.0
             self.objs.append(
                 Sprite(
-                    BLOB_SPRITES[randint(0, 3)],
+                    BLOB_SPRITES[rng.randint(0, 3)],
                     p0=position - half_size,
                     p1=position + half_size,
                     color_r=PALLETE.d_grass.to_pyglet_alpha(),
@@ -323,7 +429,7 @@ class Draw:
         #     for index, level in enumerate(LEVELS, start=1)
         # }
 
-        skin_lightness = random()
+        skin_lightness = self.rng.random()
         skin_color = COLORS.light_skin.mix(COLORS.dark_skin, skin_lightness)
         act_sprite = Sprite(
             img=ACTIVITY_SPRITES[0],
@@ -339,7 +445,7 @@ class Draw:
 
         def act_update(activity):
             act_cfg = ACTIVITY_CFG[human.activity]
-            variant = randint(0, act_cfg.variants - 1)
+            variant = self.rng.randint(0, act_cfg.variants - 1)
             act_sprite.set_img(ACTIVITY_SPRITES[activity * 3 + variant])
             act_size = size * act_cfg.icon_size
             act_sprite.resize(
@@ -392,6 +498,7 @@ class Draw:
     def track_human(self, human: Human | None):
         if self.tracked_human is not None:
             self.tracked_human.stop()
+            self.tracked_human = None
         if human is None:
             return
         self.tracked_human = TrackHumanDraw(
@@ -402,13 +509,30 @@ class Draw:
         minutes = match_time // 60
         seconds = match_time % 60
         self.match_time.text = f"{minutes:02d}:{seconds:02d}"
+        if self.tracked_human is not None:
+            self.tracked_human.update_levels()
 
     def _trivia_update(self, position, trivia_chunk, new, old):
         diff = new - old
-        if diff == 0.0:
+        if diff == 0.0 or self.trivia_levels is not None:
             return
         trivia, chunk_id = trivia_chunk
         self.trivias_level[trivia] += diff
+        self._update_trivia_dashboard()
+
+    def forgetting_update(self, diffs: dict[Trivia, float]):
+        if self.trivia_levels is not None:
+            # summed from the knowledge matrix instead of single updates
+            levels = self.trivia_levels().items()
+            self.trivias_level = defaultdict(float, {t: v for t, v in levels if v})
+        else:
+            for trivia, diff in diffs.items():
+                self.trivias_level[trivia] += diff
+        self._update_trivia_dashboard()
+        if self.tracked_human is not None:
+            self.tracked_human._trivia_update()
+
+    def _update_trivia_dashboard(self):
         gen = zip(
             range(1, 11),
             sorted(self.trivias_level.items(), key=lambda o: o[1], reverse=True),
@@ -166,10 +166,13 @@ class TrackHumanDraw:
         self._trivia_update()
         self._friend_update()
         self._act_update(human.activity)
+        self.update_levels()
+
+    def update_levels(self):
+        # levels change between observer calls too - polled from time to time
         for level in LEVELS:
             attr = level.attr
-            value = getattr(human.levels, attr).value
-            self._level_update(attr, value)
+            self._level_update(attr, self.human.levels.get(attr))
 
     def on_resize(self, width: int):
         self._translate(width, self.objs)
@@ -0,0 +1,98 @@
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:
+    NUMPY_FOUND = False
+else:
+    NUMPY_FOUND = True
+
+from recomm_town import actions
+from recomm_town.actions import Action
+from recomm_town.human import Activity, Human
+from recomm_town.movement import MovementIntegrator
+
+
+class ArrayEngine:
+    IDLE = 0
+    MOVE = 1
+    WAIT = 2
+
+    people: list[Human]
+    movement: MovementIntegrator
+    activity: "np.ndarray"
+    phase: "np.ndarray"
+    timer: "np.ndarray"
+    actions: list[Action | None]
+
+    def __init__(self, people: list[Human]):
+        if not NUMPY_FOUND:
+            raise RuntimeError("the array engine needs numpy")
+        size = len(people)
+        self.people = people
+        self.movement = MovementIntegrator(people)
+        self.activity = np.array([h.activity for h in people], dtype=np.int8)
+        self.phase = np.zeros(size, dtype=np.int8)
+        self.timer = np.zeros(size)
+        self.actions = [None] * size
+
+        for index, human in enumerate(people):
+            human.activity_observers["engine"] = partial(self._update_activity, index)
+
+    def activity_counts(self) -> dict[Activity, int]:
+        counts = np.bincount(self.activity, minlength=len(Activity)).tolist()
+        return dict(zip(Activity, counts))
+
+    def idle_indices(self) -> list[int]:
+        return np.flatnonzero(self.phase == self.IDLE).tolist()
+
+    def adopt(self, index: int, human: Human, action: Action) -> bool:
+        match action:
+            case actions.Move():
+                self.phase[index] = self.MOVE
+                self.movement.start(index, human.position, [action.position])
+            case actions.MoveAlong():
+                self.phase[index] = self.MOVE
+                self.movement.start(
+                    index, human.position, action.points, action.cursor, action.end
+                )
+            case actions.UpdateLevelsInTime():
+                # levels follow their rates on their own, only the timer is left
+                action.on_start(human)
+                self.phase[index] = self.WAIT
+                self.timer[index] = action.time
+            case actions.Wait():
+                self.phase[index] = self.WAIT
+                self.timer[index] = action.time
+            case _:
+                return False
+        self.actions[index] = action
+        return True
+
+    def step(self, dt: float) -> list[int]:
+        phase = self.phase
+        finished = [
+            self._step_move(dt),
+            self._step_wait(np.flatnonzero(phase == self.WAIT), dt),
+        ]
+        done = np.concatenate(finished)
+        phase[done] = self.IDLE
+        indices = done.tolist()
+        for index in indices:
+            self.actions[index] = None
+        return indices
+
+    def _step_move(self, dt: float) -> "np.ndarray":
+        moved, finished = self.movement.step(dt)
+        self.movement.emit(self.people, moved)
+        return finished
+
+    def _step_wait(self, indices: "np.ndarray", dt: float) -> "np.ndarray":
+        if not indices.size:
+            return indices
+        timer = self.timer[indices] - dt
+        self.timer[indices] = timer
+        return indices[timer <= 0.0]
+
+    def _update_activity(self, index: int, activity: Activity):
+        self.activity[index] = activity
@@ -2,6 +2,7 @@
 from pathlib import Path
 from functools import partial
 from queue import Queue
+from random import Random
 from threading import Thread, Event
 from time import sleep
 
@@ -11,24 +12,54 @@ import pyglet
 pyglet.options["debug_gl"] = False
 
 from recomm_town.app import App
+from recomm_town.clock import SimulationClock
 from recomm_town.draw import Draw
 from recomm_town.creator.parser import WorldParser
+from recomm_town.engine import ArrayEngine
+from recomm_town.knowledge import KnowledgeMatrix
+from recomm_town.profiler import TickProfiler
 from recomm_town.reporter import TriviaReporter
 
 
-def run(town: Path, match_time: int, fullscreen: bool, output_filename: str):
-    parser = WorldParser(town)
+def run(
+    town: Path,
+    match_time: int,
+    fullscreen: bool,
+    output_filename: str,
+    step: float = 1 / 60,
+    max_substeps: int = 8,
+    seed: int | None = None,
+    profile_filename: str | None = None,
+    array_engine: bool = False,
+    knowledge_matrix: bool = False,
+):
+    parser = WorldParser(town, Random(seed))
     parser.load()
-    world = parser.create_world()
+    world = parser.create_world(SimulationClock(step, max_substeps))
     event_queue = Queue()
+    if array_engine:
+        world.engine = ArrayEngine(world.people)
+    if knowledge_matrix:
+        world.knowledge = KnowledgeMatrix(parser.trivia_index, world.people)
+    profiler = TickProfiler() if profile_filename else None
+    world.profiler = profiler
 
     app = App(world, event_queue, match_time=match_time)
     if fullscreen:
         display = pyglet.canvas.get_display()
         screen = display.get_screens()[0]
         app.set_fullscreen(screen=screen)
-    draw = Draw(app.batch, app.people_group, app.gui_group, app.width, app.height)
-    draw.draw_gui(app.match_time)
+    draw = Draw(
+        app.batch,
+        app.people_group,
+        app.gui_group,
+        app.width,
+        app.height,
+        Random(seed),  # own stream - drawing must not shift the simulation dice
+    )
+    draw.draw_gui(app.match_time, profiler)
+    draw.draw_activities(world.activity_histogram)
+    draw.draw_occupancy(world.town.places)
     draw.draw_blobs(world.town.boundaries, app.town_group)
     draw.draw_path(world.town.path, app.town_group)
     draw.draw_places(world.town.places, app.town_group, app.label_group)
@@ -45,14 +76,24 @@ def run(town: Path, match_time: int, fullscreen: bool, output_filename: str):
     app.human_observers["draw"] = draw.track_human
     app.time_observers["draw"] = draw.tick_tock
     app.zoom_observers["draw"] = draw.zoom
-    reporter = TriviaReporter(world.town.boundaries)
+    app.time_observers["activities"] = draw.update_activities
+    app.time_observers["occupancy"] = draw.update_occupancy
+    world.forgetting_observers["draw"] = draw.forgetting_update
+    if world.knowledge is not None:
+        draw.trivia_levels = world.knowledge.trivia_levels
+    reporter = TriviaReporter(world.town.boundaries, world.clock)
     app.time_observers["report"] = partial(reporter.write_on_minute, output_filename)
-    reporter.register(world.people)
+    reporter.register(world)
+    if profiler is not None:
+        app.time_observers["profiler"] = draw.update_profiler
+        profiler.instrument(world.people)
     try:
         app.run()
     finally:
         # serial_thread_event.set()
         reporter.write(output_filename)
+        if profiler is not None:
+            profiler.write(profile_filename)
 
 
 def _serial(event_queue: Queue, event: Event):
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import argparse
+import os
+from dataclasses import replace
+from math import ceil
+from pathlib import Path
+from random import Random
+
+os.environ.setdefault("ASSETS", str(Path(__file__).parent / "assets"))
+
+from recomm_town.clock import SimulationClock, parse_step
+from recomm_town.creator.parser import WorldParser
+from recomm_town.engine import ArrayEngine
+from recomm_town.knowledge import KnowledgeDecay, KnowledgeMatrix
+from recomm_town.profiler import TickProfiler
+from recomm_town.reporter import TriviaReporter
+from recomm_town.world import World
+
+parser = argparse.ArgumentParser()
+parser.add_argument("town", type=Path)
+parser.add_argument("--sim-seconds", type=float, default=600.0)
+parser.add_argument("--dt", type=parse_step, default=1 / 60)
+parser.add_argument("--output", type=str, default="output.json")
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument("--profile", type=str, default=None)
+parser.add_argument("--array-engine", action="store_true")
+knowledge_group = parser.add_mutually_exclusive_group()
+knowledge_group.add_argument("--knowledge-matrix", action="store_true")
+knowledge_group.add_argument("--lazy-forgetting", action="store_true")
+
+
+def run(
+    town: Path,
+    sim_seconds: float,
+    dt: float,
+    output_filename: str,
+    seed: int | None = None,
+    levels: dict[str, float] | None = None,
+    profile_filename: str | None = None,
+    array_engine: bool = False,
+    knowledge_matrix: bool = False,
+    lazy_forgetting: bool = False,
+):
+    world_parser = WorldParser(town, Random(seed))
+    world_parser.load()
+    world = world_parser.create_world(
+        SimulationClock(step=dt),
+        replace(world_parser.levels, **(levels or {})),
+    )
+
+    if array_engine:
+        world.engine = ArrayEngine(world.people)
+    if knowledge_matrix:
+        world.knowledge = KnowledgeMatrix(world_parser.trivia_index, world.people)
+    if lazy_forgetting:
+        world.knowledge_decay = KnowledgeDecay(
+            world.clock, world.levels.forgetting_factor, world.people
+        )
+    reporter = TriviaReporter(world.town.boundaries, world.clock)
+    reporter.register(world)
+    if profile_filename:
+        world.profiler = TickProfiler()
+        world.profiler.instrument(world.people)
+    try:
+        simulate(world, sim_seconds, dt)
+    finally:
+        reporter.write(output_filename)
+        if world.profiler is not None:
+            world.profiler.write(profile_filename)
+
+
+def simulate(world: World, sim_seconds: float, dt: float):
+    do_it = world.do_it
+    ticks = ceil(round(sim_seconds / dt, 6))
+    while world.clock.ticks < ticks:
+        do_it(dt)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    run(
+        town=args.town,
+        sim_seconds=args.sim_seconds,
+        dt=args.dt,
+        output_filename=args.output,
+        seed=args.seed,
+        profile_filename=args.profile,
+        array_engine=args.array_engine,
+        knowledge_matrix=args.knowledge_matrix,
+        lazy_forgetting=args.lazy_forgetting,
+    )
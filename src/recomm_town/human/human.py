@@ -1,6 +1,6 @@
-from collections import defaultdict
-from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Self
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Self
 
 from recomm_town.common import Book, Vec, Trivia, TriviaChunk
 from recomm_town.human.level import Level
@@ -11,6 +11,8 @@ from recomm_town.observer import Observer
 
 if TYPE_CHECKING:
     from recomm_town.actions import Action
+    from recomm_town.clock import SimulationClock
+    from recomm_town.knowledge import KnowledgeView
     from recomm_town.town import Place, Room
 
 
@@ -24,17 +26,75 @@ class HumanInfo:
     stranger_trust_level: float = 0.5
 
 
-@dataclass
+def _level(attr: str) -> property:
+    return property(lambda self: self.get(attr))
+
+
 class Levels:
-    fridge: Level = field(default_factory=lambda: Level(1.0))
-    satiety: Level = field(default_factory=lambda: Level(1.0))
-    money: Level = field(default_factory=lambda: Level(0.0))
-    energy: Level = field(default_factory=lambda: Level(1.0))
+    # piecewise-linear in time - values at `since` change by `rates` per
+    # second until `until`. Current values are computed on read, clamped
+    # to [0, 1]. Time comes from the world clock, set by World.
+    __slots__ = ("clock", "values", "rates", "since", "until")
+
+    NAMES = ("fridge", "satiety", "money", "energy")
+
+    clock: "SimulationClock | None"
+    values: dict[str, float]
+    rates: dict[str, float]
+    since: float
+    until: float
+
+    fridge = _level("fridge")
+    satiety = _level("satiety")
+    money = _level("money")
+    energy = _level("energy")
+
+    def __init__(self, fridge=1.0, satiety=1.0, money=0.0, energy=1.0):
+        self.clock = None
+        self.values = dict(fridge=fridge, satiety=satiety, money=money, energy=energy)
+        self.rates = {}
+        self.since = self.until = 0.0
+
+    def __repr__(self):
+        values = ", ".join(f"{a}={self.get(a):0.3f}" for a in self.NAMES)
+        return f"Levels({values})"
+
+    def get(self, attr: str) -> float:
+        value = self.values[attr]
+        if rate := self.rates.get(attr):
+            elapsed = min(self.clock.time, self.until) - self.since
+            value = min(1.0, max(0.0, value + rate * elapsed))
+        return value
+
+    def add(self, attr: str, value: float) -> float:
+        self._fold()
+        value = min(1.0, max(0.0, self.values[attr] + value))
+        self.values[attr] = value
+        return value
+
+    def start(self, rates: Iterable[tuple[str, float]], duration: float):
+        if self.clock is None:
+            raise RuntimeError("levels without a clock cannot change in time")
+        self._fold()
+        self.rates = dict(rates)
+        self.since = self.clock.time
+        self.until = self.since + duration
+
+    def stop(self):
+        self._fold()
+        self.rates = {}
+
+    def _fold(self):
+        if not self.rates:
+            return
+        values = {attr: self.get(attr) for attr in self.rates}
+        self.values.update(values)
+        self.since = min(self.clock.time, self.until)
 
 
 class Human:
-    knowledge: dict[Trivia, dict[int, float]]
-    actions: list["Action"]
+    knowledge: "dict[Trivia, dict[int, float]] | KnowledgeView"
+    actions: deque["Action"]
     library: list[Book]
     position: Vec
     info: HumanInfo
@@ -49,7 +109,7 @@ class Human:
         self.position = position
         self.knowledge = {}
         self.friend_levels = defaultdict(Level)
-        self.actions = []
+        self.actions = deque()
         self.library = []
         self.info = info
         self.levels = Levels()
@@ -104,11 +164,19 @@ class Human:
         self.activity = activity
         self.activity_observers(activity)
 
-    def update_level(self, attr: str, value: float):
-        level = getattr(self.levels, attr)
-        level += value
-        setattr(self.levels, attr, level)
-        self.level_observers(attr, level.value)
+    def start_level_rates(self, rates: Iterable[tuple[str, float]], duration: float):
+        self.levels.start(rates, duration)
+        self._notify_levels()
+
+    def stop_level_rates(self):
+        self.levels.stop()
+        self._notify_levels()
+
+    def _notify_levels(self):
+        if not self.level_observers:
+            return
+        for attr in Levels.NAMES:
+            self.level_observers(attr, self.levels.get(attr))
 
     def update_friend_level(self, other: "Human", value: float = 0.1):
         if other is self:
@@ -130,32 +198,28 @@ class Human:
         self, trivia_chunk: TriviaChunk, value: float, max_value: float = 1.0
     ):
         trivia, chunk_id = trivia_chunk
-        try:
-            chunks = self.knowledge[trivia]
-        except KeyError:
-            chunks = {}
-            self.knowledge[trivia] = chunks
+        chunks = self.knowledge.get(trivia)
+        if chunks is None:
+            chunks = self.knowledge.setdefault(trivia, {})
 
         prev_value = chunks.get(chunk_id, 0.0)
         new_value = prev_value + min(value, max(0.0, max_value - prev_value))
         chunks[chunk_id] = new_value
         self.knowledge_observers(self.position, trivia_chunk, new_value, prev_value)
 
-    def forget_trivias(self, forgetting_factor: float):
-        if not self.knowledge:
-            return
-        new_knowledge: dict[Trivia, dict[int, float]] = {}
+    def forget_trivias(self, forgetting_factor: float) -> dict[Trivia, float]:
+        # summed changes per trivia, notifying is up to the caller
+        diffs = {}
         for trivia, chunks in self.knowledge.items():
             forgetting_level = trivia.forgetting_level * forgetting_factor
-            new_chunks: dict[int, float] = {}
-            for chunk_id, level in chunks.items():
+            diff = 0.0
+            for chunk_id, level in list(chunks.items()):
                 new_level = max(0.0, level - forgetting_level)
-                new_chunks[chunk_id] = new_level
-                self.knowledge_observers(
-                    self.position, trivia.get_chunk(chunk_id), new_level, level
-                )
-            new_knowledge[trivia] = new_chunks
-        self.knowledge = new_knowledge
+                chunks[chunk_id] = new_level
+                diff += new_level - level
+            if diff:
+                diffs[trivia] = diff
+        return diffs
 
     def move(self, dx, dy):
         old_position = self.position
@@ -0,0 +1,333 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+try:
+    import numpy as np
+except ImportError:
+    NUMPY_FOUND = False
+else:
+    NUMPY_FOUND = True
+
+from recomm_town.clock import SimulationClock
+from recomm_town.common import Trivia
+from recomm_town.human import Human
+
+
+class TriviaIndex:
+    # dense ids - every chunk of every trivia gets its own column
+    trivias: list[Trivia]
+    ids: dict[Trivia, int]
+    offsets: list[int]
+    total_chunks: int
+
+    def __init__(self, trivias: Iterable[Trivia] = ()):
+        self.trivias = []
+        self.ids = {}
+        self.offsets = []
+        self.total_chunks = 0
+        for trivia in trivias:
+            self.intern(trivia)
+
+    def intern(self, trivia: Trivia) -> int:
+        try:
+            return self.ids[trivia]
+        except KeyError:
+            pass
+        trivia_id = len(self.trivias)
+        self.trivias.append(trivia)
+        self.ids[trivia] = trivia_id
+        self.offsets.append(self.total_chunks)
+        self.total_chunks += trivia.chunks
+        return trivia_id
+
+    def column(self, trivia: Trivia, chunk_id: int) -> int:
+        return self.offsets[self.ids[trivia]] + chunk_id
+
+
+class KnowledgeMatrix:
+    # knowledge of the whole population, one row per human.
+    # Humans get views with the old dict-like api.
+    index: TriviaIndex
+    values: "np.ndarray"
+    known: "np.ndarray"
+    known_trivias: "np.ndarray"
+    _forgetting_levels: "np.ndarray"
+
+    def __init__(self, index: TriviaIndex, people: list[Human]):
+        if not NUMPY_FOUND:
+            raise RuntimeError("the knowledge matrix needs numpy")
+        self.index = index
+        size = len(people)
+        self.values = np.zeros((size, index.total_chunks), dtype=np.float32)
+        self.known = np.zeros((size, index.total_chunks), dtype=bool)
+        self.known_trivias = np.zeros((size, len(index.trivias)), dtype=bool)
+        for row, human in enumerate(people):
+            if human.knowledge:
+                raise RuntimeError("knowledge matrix must be set up before learning")
+            human.knowledge = KnowledgeView(self, row)
+        self._forgetting_levels = np.repeat(
+            np.array([t.forgetting_level for t in index.trivias], dtype=np.float32),
+            [t.chunks for t in index.trivias],
+        )
+
+    def forget(self, forgetting_factor: float) -> dict[Trivia, float]:
+        # same decay as Human.forget_trivias, for everyone at once
+        index = self.index
+        if not index.trivias:
+            return {}
+        dose = self.known_trivias.sum(axis=1, dtype=np.float32) * forgetting_factor
+        old_values = self.values
+        new_values = old_values - dose[:, None] * self._forgetting_levels
+        np.maximum(new_values, 0.0, out=new_values)
+        diffs = np.add.reduceat((new_values - old_values).sum(axis=0), index.offsets)
+        self.values = new_values
+        return {t: d for t, d in zip(index.trivias, diffs.tolist()) if d}
+
+    def trivia_levels(self) -> dict[Trivia, float]:
+        # knowledge of the whole population per trivia, one reduction
+        if not self.index.trivias:
+            return {}
+        sums = np.add.reduceat(self.values.sum(axis=0), self.index.offsets)
+        return dict(zip(self.index.trivias, sums.tolist()))
+
+
+class KnowledgeView(Mapping[Trivia, "ChunksView"]):
+    __slots__ = ("matrix", "row")
+
+    def __init__(self, matrix: KnowledgeMatrix, row: int):
+        self.matrix = matrix
+        self.row = row
+
+    def __getitem__(self, trivia: Trivia) -> "ChunksView":
+        trivia_id = self.matrix.index.ids[trivia]
+        if not self.matrix.known_trivias[self.row, trivia_id]:
+            raise KeyError(trivia)
+        return ChunksView(self.matrix, self.row, trivia_id)
+
+    def __setitem__(self, trivia: Trivia, chunks: Mapping[int, float]):
+        trivia_id = self.matrix.index.ids[trivia]
+        self.matrix.known_trivias[self.row, trivia_id] = True
+        view = ChunksView(self.matrix, self.row, trivia_id)
+        for chunk_id, value in chunks.items():
+            view[chunk_id] = value
+
+    def setdefault(self, trivia: Trivia, default: Mapping[int, float]) -> "ChunksView":
+        try:
+            return self[trivia]
+        except KeyError:
+            self[trivia] = default
+            return self[trivia]
+
+    def __iter__(self) -> Iterator[Trivia]:
+        trivias = self.matrix.index.trivias
+        for trivia_id in np.flatnonzero(self.matrix.known_trivias[self.row]).tolist():
+            yield trivias[trivia_id]
+
+    def __len__(self) -> int:
+        return int(self.matrix.known_trivias[self.row].sum())
+
+    def __bool__(self) -> bool:
+        return bool(self.matrix.known_trivias[self.row].any())
+
+
+class ChunksView(Mapping[int, float]):
+    __slots__ = ("matrix", "row", "start", "stop")
+
+    def __init__(self, matrix: KnowledgeMatrix, row: int, trivia_id: int):
+        self.matrix = matrix
+        self.row = row
+        self.start = matrix.index.offsets[trivia_id]
+        self.stop = self.start + matrix.index.trivias[trivia_id].chunks
+
+    def __getitem__(self, chunk_id: int) -> float:
+        column = self.start + chunk_id
+        if not 0 <= chunk_id < self.stop - self.start:
+            raise KeyError(chunk_id)
+        if not self.matrix.known[self.row, column]:
+            raise KeyError(chunk_id)
+        return float(self.matrix.values[self.row, column])
+
+    def __setitem__(self, chunk_id: int, value: float):
+        column = self.start + chunk_id
+        self.matrix.values[self.row, column] = value
+        self.matrix.known[self.row, column] = True
+
+    def __iter__(self) -> Iterator[int]:
+        known = self.matrix.known[self.row, self.start : self.stop]
+        return iter(np.flatnonzero(known).tolist())
+
+    def __len__(self) -> int:
+        return int(self.matrix.known[self.row, self.start : self.stop].sum())
+
+
+class KnowledgeDecay:
+    # forgetting computed on read - every chunk keeps the value and time of
+    # its last write and loses rate * elapsed time since then. The rate is
+    # trivia.forgetting_level * factor / population * number of trivias the
+    # human knows, per second - same as World._forget_trivias.
+    clock: SimulationClock
+    factor: float
+    totals: defaultdict[Trivia, "DecayTotal"]
+    reported: defaultdict[Trivia, float]
+
+    def __init__(self, clock: SimulationClock, factor: float, people: list[Human]):
+        self.clock = clock
+        self.factor = factor / max(len(people), 1)
+        self.totals = defaultdict(DecayTotal)
+        self.reported = defaultdict(float)
+        for human in people:
+            if human.knowledge:
+                raise RuntimeError("knowledge decay must be set up before learning")
+            human.knowledge = DecayingKnowledge(self)
+
+    def forgotten(self) -> dict[Trivia, float]:
+        # summed changes per trivia since the last call, without the writes
+        # already seen by knowledge observers
+        diffs = {}
+        time = self.clock.time
+        for trivia, total in self.totals.items():
+            value = total.value(time)
+            diff = value - self.reported[trivia]
+            if diff:
+                diffs[trivia] = diff
+            self.reported[trivia] = value
+        return diffs
+
+
+class DecayEntry:
+    __slots__ = ("value", "time", "rate", "live")
+
+    def __init__(self, value: float, time: float, rate: float):
+        self.value = value
+        self.time = time
+        self.rate = rate
+        self.live = False
+
+    def at(self, time: float) -> float:
+        return max(0.0, self.value - self.rate * (time - self.time))
+
+
+class DecayTotal:
+    # sum of all live entries of one trivia, kept as offset - slope * time.
+    # Entries leave the sum when they decay to zero.
+    __slots__ = ("offset", "slope", "expiring", "live")
+
+    _order = count()
+
+    def __init__(self):
+        self.offset = 0.0
+        self.slope = 0.0
+        self.expiring: list[tuple[float, int, DecayEntry]] = []
+        self.live = 0
+
+    def add(self, entry: DecayEntry):
+        if entry.value <= 0.0:
+            return
+        entry.live = True
+        self.live += 1
+        self.offset += entry.value + entry.rate * entry.time
+        self.slope += entry.rate
+        if entry.rate > 0.0:
+            zero_time = entry.time + entry.value / entry.rate
+            heappush(self.expiring, (zero_time, next(self._order), entry))
+            if len(self.expiring) > 2 * self.live + 64:
+                self.expiring = [item for item in self.expiring if item[2].live]
+                heapify(self.expiring)
+
+    def remove(self, entry: DecayEntry):
+        if not entry.live:
+            return
+        entry.live = False
+        self.live -= 1
+        self.offset -= entry.value + entry.rate * entry.time
+        self.slope -= entry.rate
+
+    def value(self, time: float) -> float:
+        expiring = self.expiring
+        while expiring and expiring[0][0] <= time:
+            self.remove(heappop(expiring)[2])
+        if not self.live:
+            # drop the rounding errors collected so far
+            self.offset = self.slope = 0.0
+        return max(0.0, self.offset - self.slope * time)
+
+
+class DecayingKnowledge(Mapping[Trivia, "DecayingChunks"]):
+    __slots__ = ("decay", "entries")
+
+    def __init__(self, decay: KnowledgeDecay):
+        self.decay = decay
+        self.entries: dict[Trivia, dict[int, DecayEntry]] = {}
+
+    def __getitem__(self, trivia: Trivia) -> "DecayingChunks":
+        return DecayingChunks(self, trivia, self.entries[trivia])
+
+    def __setitem__(self, trivia: Trivia, chunks: Mapping[int, float]):
+        if trivia not in self.entries:
+            # one more trivia to forget - the decay so far is folded in
+            # before all rates go up
+            self.entries[trivia] = {}
+            self._refold()
+        view = self[trivia]
+        for chunk_id, value in chunks.items():
+            view[chunk_id] = value
+
+    def setdefault(
+        self, trivia: Trivia, default: Mapping[int, float]
+    ) -> "DecayingChunks":
+        if trivia not in self.entries:
+            self[trivia] = default
+        return self[trivia]
+
+    def __iter__(self) -> Iterator[Trivia]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def write(self, trivia: Trivia, chunk_id: int, value: float):
+        decay = self.decay
+        chunks = self.entries[trivia]
+        total = decay.totals[trivia]
+        if old_entry := chunks.get(chunk_id):
+            total.remove(old_entry)
+        rate = trivia.forgetting_level * decay.factor * len(self.entries)
+        entry = DecayEntry(value, decay.clock.time, rate)
+        chunks[chunk_id] = entry
+        total.add(entry)
+
+    def _refold(self):
+        time = self.decay.clock.time
+        for trivia, chunks in self.entries.items():
+            for chunk_id, entry in list(chunks.items()):
+                self.write(trivia, chunk_id, entry.at(time))
+
+
+class DecayingChunks(Mapping[int, float]):
+    __slots__ = ("knowledge", "trivia", "entries")
+
+    def __init__(
+        self,
+        knowledge: DecayingKnowledge,
+        trivia: Trivia,
+        entries: dict[int, DecayEntry],
+    ):
+        self.knowledge = knowledge
+        self.trivia = trivia
+        self.entries = entries
+
+    def __getitem__(self, chunk_id: int) -> float:
+        return self.entries[chunk_id].at(self.knowledge.decay.clock.time)
+
+    def __setitem__(self, chunk_id: int, value: float):
+        decay = self.knowledge.decay
+        decay.reported[self.trivia] += value - self.get(chunk_id, 0.0)
+        self.knowledge.write(self.trivia, chunk_id, value)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
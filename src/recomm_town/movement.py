@@ -0,0 +1,110 @@
+try:
+    import numpy as np
+except ImportError:
+    NUMPY_FOUND = False
+else:
+    NUMPY_FOUND = True
+
+from collections.abc import Sequence
+
+from recomm_town.common import Vec
+from recomm_town.human import Human
+from recomm_town.town import Polyline
+
+
+class MovementIntegrator:
+    INITIAL_CAPACITY = 1024
+
+    position: "np.ndarray"
+    speed: "np.ndarray"
+    active: "np.ndarray"
+    cursor: "np.ndarray"
+    end: "np.ndarray"
+    waypoints: "np.ndarray"
+    size: int
+
+    def __init__(self, people: list[Human]):
+        if not NUMPY_FOUND:
+            raise RuntimeError("the movement integrator needs numpy")
+        count = len(people)
+        self.position = np.array([h.position for h in people], dtype=float)
+        self.position.shape = (count, 2)
+        self.speed = np.array([h.info.speed for h in people], dtype=float)
+        self.active = np.zeros(count, dtype=bool)
+        # waypoints of every walking human are packed into one buffer,
+        # [cursor, end) is the part of the polyline still ahead.
+        self.cursor = np.zeros(count, dtype=np.intp)
+        self.end = np.zeros(count, dtype=np.intp)
+        self.waypoints = np.zeros((self.INITIAL_CAPACITY, 2))
+        self.size = 0
+
+    def start(
+        self,
+        index: int,
+        position: Vec,
+        points: Sequence[Vec],
+        begin: int = 0,
+        end: int | None = None,
+    ):
+        if isinstance(points, Polyline):
+            points = np.frombuffer(points.coords).reshape(-1, 2)[begin:end]
+        else:
+            points = points[begin:end]
+        count = len(points)
+        if self.size + count > len(self.waypoints):
+            self._compact(count)
+        start = self.size
+        self.waypoints[start : start + count] = points
+        self.size += count
+        self.position[index] = position
+        self.cursor[index] = start
+        self.end[index] = start + count
+        self.active[index] = True
+
+    def step(self, dt: float) -> tuple["np.ndarray", "np.ndarray"]:
+        indices = np.flatnonzero(self.active)
+        if not indices.size:
+            return indices, indices
+        cursor = self.cursor[indices]
+        target = self.waypoints[cursor]
+        position = self.position[indices]
+        diff = target - position
+        speed = self.speed[indices] * (dt * 60.0)
+        arrived = np.sqrt((diff * diff).sum(axis=1)) < speed * 2
+        # same "normalize" as Vec - by the longer axis, not by the length
+        longer = np.abs(diff).max(axis=1)
+        longer[arrived] = 1.0
+        moved = position + diff / longer[:, None] * speed[:, None]
+        self.position[indices] = np.where(arrived[:, None], target, moved)
+
+        cursor += arrived
+        self.cursor[indices] = cursor
+        finished = indices[cursor == self.end[indices]]
+        self.active[finished] = False
+        return indices, finished
+
+    def emit(self, people: list[Human], indices: "np.ndarray"):
+        for index, (x, y) in zip(indices.tolist(), self.position[indices].tolist()):
+            human = people[index]
+            old_position = human.position
+            human.position = Vec(x, y)
+            human.position_observers(human, old_position)
+
+    def _compact(self, count: int):
+        live = np.flatnonzero(self.active)
+        lengths = self.end[live] - self.cursor[live]
+        needed = int(lengths.sum()) + count
+        capacity = len(self.waypoints)
+        while capacity < needed * 2:
+            capacity *= 2
+
+        waypoints = np.empty((capacity, 2))
+        starts = np.zeros(len(live), dtype=np.intp)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        for index, start, length in zip(live, starts, lengths):
+            cursor = self.cursor[index]
+            waypoints[start : start + length] = self.waypoints[cursor : cursor + length]
+        self.waypoints = waypoints
+        self.cursor[live] = starts
+        self.end[live] = starts + lengths
+        self.size = needed - count
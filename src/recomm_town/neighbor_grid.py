@@ -0,0 +1,138 @@
+from collections import Counter
+from math import ceil, floor
+from typing import Iterable, Iterator
+
+from recomm_town.common import Vec
+from recomm_town.human import Activity, Human
+
+
+def pack_cell(x: int, y: int) -> int:
+    return (x << 32) | (y & 0xFFFFFFFF)
+
+
+class Buckets:
+    # swap-removed lists, so the order inside a cell depends only on the
+    # order of moves.
+    cells: dict[int, list[Human]]
+    slots: dict[Human, int]
+
+    def __init__(self):
+        self.cells = {}
+        self.slots = {}
+
+    def add(self, key: int, human: Human):
+        bucket = self.cells.setdefault(key, [])
+        self.slots[human] = len(bucket)
+        bucket.append(human)
+
+    def remove(self, key: int, human: Human):
+        bucket = self.cells[key]
+        slot = self.slots.pop(human)
+        last = bucket.pop()
+        if last is not human:
+            bucket[slot] = last
+            self.slots[last] = slot
+
+
+class NeighborGrid:
+    # every human sits in exactly one cell; humans doing one of the indexed
+    # activities sit in that activity's buckets as well.
+    cell_size: float
+    everyone: Buckets
+    by_activity: dict[Activity, Buckets]
+    counts: Counter[Activity]
+    _cells: dict[Human, int]
+    _activities: dict[Human, Activity]
+
+    def __init__(self, cell_size: float, indexed: Iterable[Activity] = ()):
+        self.cell_size = cell_size
+        self.everyone = Buckets()
+        self.by_activity = {activity: Buckets() for activity in indexed}
+        self.counts = Counter()
+        self._cells = {}
+        self._activities = {}
+
+    def cell(self, position: Vec) -> tuple[int, int]:
+        return floor(position.x / self.cell_size), floor(position.y / self.cell_size)
+
+    def add(self, human: Human):
+        key = pack_cell(*self.cell(human.position))
+        self._cells[human] = key
+        self._activities[human] = human.activity
+        self.everyone.add(key, human)
+        self.counts[human.activity] += 1
+        if buckets := self.by_activity.get(human.activity):
+            buckets.add(key, human)
+
+    def remove(self, human: Human):
+        key = self._cells.pop(human)
+        activity = self._activities.pop(human)
+        self.everyone.remove(key, human)
+        self.counts[activity] -= 1
+        if buckets := self.by_activity.get(activity):
+            buckets.remove(key, human)
+
+    def update(self, human: Human):
+        if self._cells[human] == pack_cell(*self.cell(human.position)):
+            return
+        self.remove(human)
+        self.add(human)
+
+    def set_activity(self, human: Human, activity: Activity):
+        old_activity = self._activities[human]
+        if old_activity == activity:
+            return
+        key = self._cells[human]
+        self.counts[old_activity] -= 1
+        self.counts[activity] += 1
+        if buckets := self.by_activity.get(old_activity):
+            buckets.remove(key, human)
+        if buckets := self.by_activity.get(activity):
+            buckets.add(key, human)
+        self._activities[human] = activity
+
+    def count(self, activity: Activity, position: Vec | None = None) -> int:
+        # everywhere, or in the 3x3 cells around the position
+        if position is None:
+            return self.counts[activity]
+        cells = self._indexed(activity).cells
+        cx, cy = self.cell(position)
+        return sum(
+            len(cells.get(pack_cell(x, y), ()))
+            for x in range(cx - 1, cx + 2)
+            for y in range(cy - 1, cy + 2)
+        )
+
+    def near(
+        self,
+        position: Vec,
+        radius: float | None = None,
+        activity: Activity | None = None,
+    ) -> Iterator[Human]:
+        # whole 3x3 cells around the position, or only people within radius
+        cells = (
+            self.everyone.cells if activity is None else self._indexed(activity).cells
+        )
+        cx, cy = self.cell(position)
+        reach = 1 if radius is None else max(1, ceil(radius / self.cell_size))
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                bucket = cells.get(pack_cell(x, y))
+                if not bucket:
+                    continue
+                if radius is None:
+                    yield from bucket
+                    continue
+                limit = radius * radius
+                px, py = position
+                for human in bucket:
+                    dx = human.position.x - px
+                    dy = human.position.y - py
+                    if dx * dx + dy * dy <= limit:
+                        yield human
+
+    def _indexed(self, activity: Activity) -> Buckets:
+        try:
+            return self.by_activity[activity]
+        except KeyError:
+            raise RuntimeError(f"activity {activity.name} is not indexed")
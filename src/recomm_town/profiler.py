@@ -0,0 +1,138 @@
+import csv
+import json
+from collections import deque
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Callable, Iterable
+
+from recomm_town.human import Human
+from recomm_town.observer import Observer
+
+
+class TickProfiler:
+    # "plan" and "observers" are nested inside "humans", "draw" is per frame.
+    SECTIONS = (
+        "programs",
+        "invites",
+        "humans",
+        "plan",
+        "forgetting",
+        "observers",
+        "draw",
+    )
+    HISTOGRAM_BUCKETS = 24  # log2 of microseconds
+
+    ticks: int
+    window: dict[str, deque[int]]
+    histograms: dict[str, list[int]]
+    totals: dict[str, int]
+    _current: dict[str, int]
+
+    def __init__(self, window: int = 600):
+        self.ticks = 0
+        self.window = {name: deque(maxlen=window) for name in self.SECTIONS}
+        self.histograms = {name: [0] * self.HISTOGRAM_BUCKETS for name in self.SECTIONS}
+        self.totals = dict.fromkeys(self.SECTIONS, 0)
+        self._current = dict.fromkeys(self.SECTIONS, 0)
+
+    def add(self, section: str, ns: int):
+        self._current[section] += ns
+
+    def measure[*Args, R](
+        self, section: str, func: Callable[[*Args], R], *args: *Args
+    ) -> R:
+        start = perf_counter_ns()
+        result = func(*args)
+        self._current[section] += perf_counter_ns() - start
+        return result
+
+    def end_tick(self):
+        # histograms cover the same ticks as the window - a sample pushed out
+        # of the window leaves its bucket too
+        self.ticks += 1
+        for section, ns in self._current.items():
+            window = self.window[section]
+            histogram = self.histograms[section]
+            if len(window) == window.maxlen:
+                histogram[self._bucket(window[0])] -= 1
+            window.append(ns)
+            histogram[self._bucket(ns)] += 1
+            self.totals[section] += ns
+            self._current[section] = 0
+
+    def _bucket(self, ns: int) -> int:
+        return min((ns // 1000).bit_length(), self.HISTOGRAM_BUCKETS - 1)
+
+    def instrument(self, people: Iterable[Human]):
+        for human in people:
+            for attr in (
+                "position_observers",
+                "level_observers",
+                "activity_observers",
+                "knowledge_observers",
+                "talk_observers",
+                "friend_observers",
+            ):
+                observer = getattr(human, attr)
+                setattr(human, attr, TimedObserver(self, "observers", observer))
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        stats = {}
+        for section, window in self.window.items():
+            samples = sorted(window)
+            if not samples:
+                continue
+            stats[section] = {
+                "mean_us": sum(samples) / len(samples) / 1000,
+                "p50_us": samples[len(samples) // 2] / 1000,
+                "p95_us": samples[int(len(samples) * 0.95)] / 1000,
+                "max_us": samples[-1] / 1000,
+                "total_ms": self.totals[section] / 1e6,
+            }
+        return stats
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"{section:>10} {s['mean_us']:9.0f}us {s['p95_us']:9.0f}us p95"
+            for section, s in self.stats().items()
+        )
+
+    def write(self, filename: Path | str):
+        stats = self.stats()
+        if Path(filename).suffix == ".csv":
+            columns = ["section", "ticks", *next(iter(stats.values()), {})]
+            with open(filename, "w", newline="") as file:
+                writer = csv.DictWriter(file, columns)
+                writer.writeheader()
+                for section, values in stats.items():
+                    writer.writerow({"section": section, "ticks": self.ticks, **values})
+            return
+
+        obj = {
+            "ticks": self.ticks,
+            "sections": stats,
+            "histograms": {
+                section: {f"<{2 ** i}us": c for i, c in enumerate(counts) if c}
+                for section, counts in self.histograms.items()
+            },
+        }
+        with open(filename, "w") as file:
+            json.dump(obj, file, indent=2)
+
+
+class TimedObserver[*Args](Observer[*Args]):
+
+    def __init__(
+        self,
+        profiler: TickProfiler,
+        section: str,
+        callbacks: dict[str, Callable[[*Args], None]],
+    ):
+        super().__init__(callbacks)
+        self.profiler = profiler
+        self.section = section
+
+    def __call__(self, *args: *Args) -> None:
+        start = perf_counter_ns()
+        super().__call__(*args)
+        self.profiler.add(self.section, perf_counter_ns() - start)
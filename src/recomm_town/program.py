@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from random import shuffle
+from random import Random
 from recomm_town.common import Trivia, TriviaChunk
 
 
@@ -22,7 +22,13 @@ class Program:
     _lifetime: float
     _index: int
 
-    def __init__(self, trivias: list[Trivia], lifetime: float, start_after: float):
+    def __init__(
+        self,
+        trivias: list[Trivia],
+        lifetime: float,
+        start_after: float,
+        rng: Random,
+    ):
         self._trivias = [TriviaWithCounter(trivia) for trivia in trivias]
         self._max_lifetime = lifetime
         self._lifetime = lifetime
@@ -30,7 +36,7 @@ class Program:
         self._index = 0
         self.time = 0.0
 
-        shuffle(self._trivias)
+        rng.shuffle(self._trivias)
         if not self._trivias or self._start_after > 0.0:
             self.trivia = None
         else:
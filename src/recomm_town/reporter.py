@@ -1,8 +1,8 @@
-import time
 import json
 from pathlib import Path
 from collections import defaultdict
 from functools import partial
+from typing import TYPE_CHECKING, Callable
 
 try:
     import numpy as np
@@ -12,21 +12,29 @@ else:
     NUMPY_FOUND = True
 
 
+from recomm_town.clock import SimulationClock
 from recomm_town.common import Trivia, TriviaChunk, Vec
-from recomm_town.human import Human
+from recomm_town.human import Activity
+from recomm_town.town import Place
+
+if TYPE_CHECKING:
+    from recomm_town.world import World
 
 
 class TriviaReporter:
     MARGIN = 250.0
     HEATMAP_SIZE = 32
 
-    start_time: float
+    clock: SimulationClock
     trivia_heatmap: defaultdict[Trivia, "np.ndarray"]
     trivia_plot: defaultdict[Trivia, list[tuple[float, float]]]
+    activity_histogram: Callable[[], dict[Activity, int]] | None
+    places: list[Place]
+    trivia_levels: Callable[[], dict[Trivia, float]] | None
 
-    def __init__(self, boundaries: tuple[Vec, Vec]):
+    def __init__(self, boundaries: tuple[Vec, Vec], clock: SimulationClock):
         margin = self.MARGIN
-        self.start_time = time.monotonic()
+        self.clock = clock
         self.start_position = boundaries[0] - margin
         self.size = boundaries[1] - boundaries[0] + margin * 2
         assert self.size.x > 0.0
@@ -44,31 +52,63 @@ class TriviaReporter:
         self.width = w
         self.height = h
         self.trivia_plot = defaultdict(list)
+        self.activity_histogram = None
+        self.places = []
+        self.trivia_levels = None
         if NUMPY_FOUND:
             self.trivia_heatmap = defaultdict(lambda: np.zeros((h, w), dtype=np.uint32))
 
     def write(self, filename: Path | str):
+        if self.trivia_levels is not None:
+            self._plot_levels(self.trivia_levels())
         label = self._trivia_label
         with open(filename, "w") as file:
             if NUMPY_FOUND:
                 heatmap = self.trivia_heatmap
             else:
-                heatmap = []
+                heatmap = {}
             plot = self.trivia_plot
             obj = {
                 "heatmap": {label(t): v.tolist() for t, v in heatmap.items()},
                 "plot": {label(t): v for t, v in plot.items()},
-                "last_values": {label(t): v[-1][1] for t, v in plot.items() if v},
+                "last_values": self.last_values(),
+                "activities": self.activities(),
+                "occupancy": self.occupancy(),
             }
             json.dump(obj, file)
 
+    def last_values(self) -> dict[str, float]:
+        label = self._trivia_label
+        return {label(t): v[-1][1] for t, v in self.trivia_plot.items() if v}
+
+    def activities(self) -> dict[str, int]:
+        if self.activity_histogram is None:
+            return {}
+        return {a.name.lower(): n for a, n in self.activity_histogram().items()}
+
+    def occupancy(self) -> dict[str, list[int]]:
+        return {p.name: [p.occupied_rooms, len(p.rooms)] for p in self.places}
+
     def write_on_minute(self, filename: Path | str, match_time: int):
         if match_time % 60 == 0:
             self.write(filename)
 
-    def register(self, people: list[Human]):
-        for human in people:
+    def register(self, world: "World"):
+        for human in world.people:
             human.knowledge_observers["reporter"] = self._trivia_update
+        world.forgetting_observers["reporter"] = self.forgetting_update
+        self.activity_histogram = world.activity_histogram
+        self.places = [place for place in world.town.places if place.rooms]
+        if world.knowledge is not None:
+            # the plot is sampled from the matrix on every forgetting tick
+            self.trivia_levels = world.knowledge.trivia_levels
+
+    def forgetting_update(self, diffs: dict[Trivia, float]):
+        if self.trivia_levels is not None:
+            self._plot_levels(self.trivia_levels())
+            return
+        for trivia, diff in diffs.items():
+            self._plot_update(trivia, diff)
 
     @staticmethod
     def _trivia_label(trivia: Trivia):
@@ -84,7 +124,8 @@ class TriviaReporter:
         trivia, _ = trivia_chunk
         if NUMPY_FOUND:
             self._heatmap_update(position - self.start_position, trivia)
-        self._plot_update(trivia, new_value - old_value)
+        if self.trivia_levels is None:
+            self._plot_update(trivia, new_value - old_value)
 
     def _heatmap_update(self, position: Vec, trivia: Trivia):
         size = self.size
@@ -98,8 +139,20 @@ class TriviaReporter:
         heatmap[height - heatmap_y, heatmap_x] += 1.0
 
     def _plot_update(self, trivia: Trivia, diff: float):
-        timestamp = time.monotonic() - self.start_time
+        timestamp = self.clock.time
         plot = self.trivia_plot[trivia]
         prev_value = plot[-1][1] if plot else 0.0
         current_value = max(0.0, prev_value + diff)
         plot.append((timestamp, current_value))
+
+    def _plot_levels(self, levels: dict[Trivia, float]):
+        timestamp = self.clock.time
+        for trivia, value in levels.items():
+            plot = self.trivia_plot.get(trivia)
+            if plot is None:
+                if not value:
+                    continue
+                plot = self.trivia_plot[trivia]
+            elif plot[-1][1] == value:
+                continue
+            plot.append((timestamp, value))
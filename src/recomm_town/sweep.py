@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from itertools import product
+from pathlib import Path
+from random import Random
+from typing import Iterator
+
+os.environ.setdefault("ASSETS", str(Path(__file__).parent / "assets"))
+
+from recomm_town.clock import SimulationClock, parse_step
+from recomm_town.creator.parser import WorldParser
+from recomm_town.headless import simulate
+from recomm_town.reporter import TriviaReporter
+from recomm_town.world import WorldLevels
+
+LEVEL_FIELDS = [f.name for f in fields(WorldLevels)]
+
+
+@dataclass
+class ParamSpec:
+    name: str
+    low: float
+    high: float
+    points: list[float]
+
+
+def parse_param(value: str) -> ParamSpec:
+    name, _, raw = value.partition("=")
+    name = name.strip().replace("-", "_")
+    if name not in LEVEL_FIELDS:
+        raise ValueError(f"unknown level {name!r}")
+    if ":" in raw:
+        match [float(x) for x in raw.split(":")]:
+            case [low, high]:
+                points = [low, high]
+            case [low, high, count] if count >= 2:
+                step = (high - low) / (int(count) - 1)
+                points = [low + step * i for i in range(int(count))]
+            case _:
+                raise ValueError(f"wrong range format: {raw!r}")
+    else:
+        points = [float(x) for x in raw.split(",")]
+    return ParamSpec(name, min(points), max(points), points)
+
+
+def grid_variants(params: list[ParamSpec], samples: int, rng: Random):
+    names = [p.name for p in params]
+    return [dict(zip(names, values)) for values in product(*(p.points for p in params))]
+
+
+def random_variants(params: list[ParamSpec], samples: int, rng: Random):
+    return [
+        {p.name: rng.uniform(p.low, p.high) for p in params} for _ in range(samples)
+    ]
+
+
+def latin_hypercube_variants(params: list[ParamSpec], samples: int, rng: Random):
+    columns = {}
+    for p in params:
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        columns[p.name] = [
+            p.low + (p.high - p.low) * (stratum + rng.random()) / samples
+            for stratum in strata
+        ]
+    return [
+        {name: column[i] for name, column in columns.items()} for i in range(samples)
+    ]
+
+
+SAMPLERS = {
+    "grid": grid_variants,
+    "random": random_variants,
+    "lhs": latin_hypercube_variants,
+}
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("towns", type=Path, nargs="+")
+parser.add_argument("--mode", choices=list(SAMPLERS), default="grid")
+parser.add_argument("--param", type=parse_param, action="append", default=[])
+parser.add_argument("--samples", type=int, default=10)
+parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+parser.add_argument("--town-seed", type=int, default=0)
+parser.add_argument("--sim-seconds", type=float, default=600.0)
+parser.add_argument("--dt", type=parse_step, default=1 / 60)
+parser.add_argument("--output", type=Path, default=Path("sweep.csv"))
+parser.add_argument("--workers", type=int, default=os.cpu_count())
+
+
+def run_sweep(
+    towns: list[Path],
+    variants: list[dict[str, float]],
+    seeds: list[int],
+    sim_seconds: float,
+    dt: float,
+    workers: int | None = None,
+    town_seed: int = 0,
+) -> Iterator[dict]:
+    # every town is parsed once, workers unpickle a fresh copy for each run.
+    parsed = {town: pickle.dumps(_parse(town, town_seed)) for town in towns}
+    jobs = product(towns, enumerate(variants or [{}]), seeds)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(parsed,),
+    ) as executor:
+        futures = [
+            executor.submit(_run_variant, town, index, levels, seed, sim_seconds, dt)
+            for town, (index, levels), seed in jobs
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def write_table(filename: Path | str, rows: Iterator[dict]):
+    columns = ["town", "variant", "seed", *LEVEL_FIELDS, "trivia", "value"]
+    with open(filename, "w", newline="") as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def _parse(town: Path, seed: int) -> WorldParser:
+    world_parser = WorldParser(town, Random(seed))
+    world_parser.load()
+    return world_parser
+
+
+_parsed: dict[Path, bytes] = {}
+
+
+def _init_worker(parsed: dict[Path, bytes]):
+    _parsed.update(parsed)
+
+
+def _run_variant(
+    town: Path,
+    index: int,
+    levels: dict[str, float],
+    seed: int,
+    sim_seconds: float,
+    dt: float,
+) -> list[dict]:
+    world_parser: WorldParser = pickle.loads(_parsed[town])
+    world_parser.rng.seed(seed)
+    world_levels = replace(world_parser.levels, **levels)
+    world = world_parser.create_world(SimulationClock(step=dt), world_levels)
+
+    reporter = TriviaReporter(world.town.boundaries, world.clock)
+    reporter.register(world)
+    simulate(world, sim_seconds, dt)
+
+    row = {"town": town.stem, "variant": index, "seed": seed, **asdict(world_levels)}
+    return [
+        row | {"trivia": trivia, "value": value}
+        for trivia, value in reporter.last_values().items()
+    ]
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    sampler = SAMPLERS[args.mode]
+    variants = sampler(args.param, args.samples, Random(args.town_seed))
+    rows = run_sweep(
+        towns=args.towns,
+        variants=variants,
+        seeds=args.seeds,
+        sim_seconds=args.sim_seconds,
+        dt=args.dt,
+        workers=args.workers,
+        town_seed=args.town_seed,
+    )
+    write_table(args.output, rows)
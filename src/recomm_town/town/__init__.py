@@ -1,4 +1,5 @@
 from .place import Place, PlaceFunction, Room, LocalRoom
 from .town import Town
+from .polyline import Polyline
 from .routes import Routes
 from .routes_factory import RoutesFactory
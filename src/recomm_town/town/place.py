@@ -1,7 +1,7 @@
 from enum import Enum
 from dataclasses import dataclass, field
 from functools import total_ordering
-from random import random
+from random import Random
 from typing import Iterable, Self
 
 from recomm_town.common import Book, Rotate, Trivia, Vec
@@ -31,6 +31,7 @@ class Room:
     occupied_by: "Human | None" = None
     owner: "Human | None" = None
     rotation: float = 0.0
+    index: int = 0
 
 
 @total_ordering
@@ -49,6 +50,10 @@ class Place:
     books: list[Book]
     members: list[Human]
     look: str
+    # indexes of free rooms, swap-removed - _free_slots[room.index] is the
+    # position of a room in free_rooms or -1 when it is taken.
+    free_rooms: list[int]
+    _free_slots: list[int]
 
     def __init__(
         self,
@@ -90,9 +95,12 @@ class Place:
                 position=p + rot(room.local_position * s),
                 path=[p + rot(vec * s) for vec in room.local_path],
                 rotation=self.rotation + room.rotation,
+                index=index,
             )
-            for room in rooms
+            for index, room in enumerate(rooms)
         ]
+        self.free_rooms = list(range(len(self.rooms)))
+        self._free_slots = list(range(len(self.rooms)))
 
         if rooms:
             h = s / 2
@@ -115,9 +123,44 @@ class Place:
     def __hash__(self):
         return hash(self.name)
 
+    def __reduce__(self):
+        # name goes first - places sit in each other's sets while being unpickled
+        return _place_with_name, (type(self), self.name), self.__dict__
+
     def __repr__(self):
         return f"Place[{self.name}]"
 
+    @property
+    def occupied_rooms(self) -> int:
+        return len(self.rooms) - len(self.free_rooms)
+
+    @property
+    def is_full(self) -> bool:
+        return not self.free_rooms
+
+    def find_free_room(self, rng: Random) -> Room | None:
+        if not self.free_rooms:
+            return None
+        return self.rooms[rng.choice(self.free_rooms)]
+
+    def take_room(self, room: Room, human: Human):
+        room.occupied_by = human
+        slot = self._free_slots[room.index]
+        if slot < 0:
+            return
+        last = self.free_rooms.pop()
+        if last != room.index:
+            self.free_rooms[slot] = last
+            self._free_slots[last] = slot
+        self._free_slots[room.index] = -1
+
+    def free_room(self, room: Room):
+        room.occupied_by = None
+        if room.owner or self._free_slots[room.index] >= 0:
+            return
+        self._free_slots[room.index] = len(self.free_rooms)
+        self.free_rooms.append(room.index)
+
     def connect(self, *others: Self):
         for other in others:
             self.neighborhood.add(other)
@@ -134,11 +177,18 @@ class Place:
         return self.name < other.name
 
 
+def _place_with_name(cls: type[Place], name: str) -> Place:
+    place = cls.__new__(cls)
+    place.name = name
+    return place
+
+
 @dataclass
 class Invite:
     place: Place
     period: float
     priority: float = 1.0
+    rng: Random = field(default_factory=Random, repr=False, compare=False)
     lifetime: float = field(init=False)
 
     def __post_init__(self):
@@ -159,8 +209,9 @@ class Invite:
     def _invite(self):
         place = self.place
         prior = self.priority
+        rng = self.rng
         for member in place.members:
-            if random() > prior:
+            if rng.random() > prior:
                 continue
             member.invite_to_place(place)
 
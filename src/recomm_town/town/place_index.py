@@ -0,0 +1,114 @@
+from collections import defaultdict
+from heapq import heappush, heappushpop
+from math import sqrt
+from typing import Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    NUMPY_FOUND = False
+else:
+    NUMPY_FOUND = True
+
+from recomm_town.common import Vec
+from recomm_town.town.place import Place
+
+
+class PlaceIndex:
+    # distances compared in bulk at once, keeps memory of many_nearest flat
+    BULK_CHUNK = 1 << 20
+
+    places: list[Place]
+    xs: list[float]
+    ys: list[float]
+    cell_size: float
+    cells: dict[tuple[int, int], list[int]]
+
+    def __init__(self, places: list[Place], cell_size: float | None = None):
+        if not places:
+            raise RuntimeError("cannot index a town without places")
+        self.places = places
+        self.xs = [p.position.x for p in places]
+        self.ys = [p.position.y for p in places]
+        width = max(self.xs) - min(self.xs)
+        height = max(self.ys) - min(self.ys)
+        if cell_size is None:
+            # around one place per cell
+            cell_size = sqrt(width * height / len(places))
+            cell_size = cell_size or max(width, height) / len(places) or 1.0
+        self.cell_size = cell_size
+
+        cells = defaultdict(list)
+        for index, (x, y) in enumerate(zip(self.xs, self.ys)):
+            cells[self._cell(x, y)].append(index)
+        self.cells = dict(cells)
+        self._low = self._cell(min(self.xs), min(self.ys))
+        self._high = self._cell(max(self.xs), max(self.ys))
+
+    def nearest(self, position: Vec) -> Place:
+        return self.places[self._search(position, 1)[0][1]]
+
+    def k_nearest(self, position: Vec, k: int) -> list[Place]:
+        return [self.places[index] for _, index in self._search(position, k)]
+
+    def many_nearest(self, positions: Iterable[Vec]) -> list[Place]:
+        if not NUMPY_FOUND:
+            return [self.nearest(position) for position in positions]
+        points = np.array(list(positions), dtype=float).reshape(-1, 2)
+        xs = np.array(self.xs)
+        ys = np.array(self.ys)
+        step = max(1, self.BULK_CHUNK // len(xs))
+        indices = []
+        for start in range(0, len(points), step):
+            chunk = points[start : start + step]
+            dx = xs[None, :] - chunk[:, 0, None]
+            dy = ys[None, :] - chunk[:, 1, None]
+            indices += np.argmin(dx * dx + dy * dy, axis=1).tolist()
+        return [self.places[index] for index in indices]
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _search(self, position: Vec, k: int) -> list[tuple[float, int]]:
+        # rings of cells around the position. Heap keeps the k best as
+        # (-distance, -index) - ties are won by the lower index, like min().
+        x, y = position
+        cx, cy = self._cell(x, y)
+        xs, ys, cells = self.xs, self.ys, self.cells
+        k = min(k, len(xs))
+        best: list[tuple[float, int]] = []
+        (low_x, low_y), (high_x, high_y) = self._low, self._high
+        first_ring = max(low_x - cx, cx - high_x, low_y - cy, cy - high_y, 0)
+        last_ring = max(cx - low_x, high_x - cx, cy - low_y, high_y - cy)
+        for ring in range(first_ring, last_ring + 1):
+            if len(best) == k:
+                bound = (ring - 1) * self.cell_size
+                if bound > 0.0 and -best[0][0] < bound * bound:
+                    break
+            for cell in self._ring(cx, cy, ring):
+                for index in cells.get(cell, ()):
+                    dx = xs[index] - x
+                    dy = ys[index] - y
+                    item = (-(dx * dx + dy * dy), -index)
+                    if len(best) < k:
+                        heappush(best, item)
+                    elif item > best[0]:
+                        heappushpop(best, item)
+        return sorted((-d, -i) for d, i in best)
+
+    def _ring(self, cx: int, cy: int, ring: int) -> Iterable[tuple[int, int]]:
+        # only the part of the ring that overlaps the grid
+        (low_x, low_y), (high_x, high_y) = self._low, self._high
+        if ring == 0:
+            yield cx, cy
+            return
+        xs = range(max(cx - ring, low_x), min(cx + ring, high_x) + 1)
+        for y in (cy - ring, cy + ring):
+            if low_y <= y <= high_y:
+                for x in xs:
+                    yield x, y
+        ys = range(max(cy - ring + 1, low_y), min(cy + ring - 1, high_y) + 1)
+        for x in (cx - ring, cx + ring):
+            if low_x <= x <= high_x:
+                for y in ys:
+                    yield x, y
@@ -0,0 +1,31 @@
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from recomm_town.common import Vec
+from recomm_town.town.place import Place
+
+
+@dataclass
+class Polyline(Sequence[Vec]):
+    # packed x0, y0, x1, y1, ...
+    coords: array = field(default_factory=lambda: array("d"))
+    # places on the way, each with the index of the first point after it
+    stops: list[tuple[int, Place]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.coords) // 2
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return Vec(self.coords[2 * index], self.coords[2 * index + 1])
+
+    def append(self, point: Vec):
+        self.coords.extend(point)
+
+    def extend(self, points: list[Vec]):
+        for point in points:
+            self.coords.extend(point)
@@ -1,37 +1,45 @@
-from typing import Optional
+from array import array
+from typing import Iterator, Optional
 
 from recomm_town.town.place import Place
 
 
 class Routes:
-    __data: dict[tuple[Place, Place], list[Place]]
-
-    def __init__(self) -> None:
-        self.__data = {}
-
-    def items(self):
-        return self.__data.items()
-
-    def get(self, a: Place, b: Place) -> Optional[list[Place]]:
-        if a < b:
-            return self.__data.get((a, b))
-        else:
-            route = self.__data.get((b, a))
-            return route and route[::-1]
+    places: list[Place]
+    index: dict[Place, int]
+    # flat [size x size] table - next_hops[a * size + b] is the place right
+    # after a on the shortest way from a to b, -1 if there is no way.
+    next_hops: array
+
+    def __init__(self, places: list[Place], next_hops: array | None = None) -> None:
+        self.places = places
+        self.index = {place: i for i, place in enumerate(places)}
+        self.next_hops = next_hops or array("i", [-1]) * len(places) ** 2
+
+    def get(self, a: Place, b: Place) -> Optional[Iterator[Place]]:
+        # places between a and b, lazily - without a and b themselves
+        i = self.index[a]
+        j = self.index[b]
+        if i != j and self.next_hops[i * len(self.places) + j] < 0:
+            return None
+        return self._walk(i, j)
 
     def __getitem__(self, __key: tuple[Place, Place]) -> list[Place]:
-        a, b = __key
-        if a < b:
-            return self.__data[a, b]
-        else:
-            return self.__data[b, a][::-1]
-
-    def __setitem__(self, __key: tuple[Place, Place], __value: list[Place]) -> None:
-        a, b = __key
-        if a < b:
-            self.__data[a, b] = __value
-        else:
-            self.__data[b, a] = __value[::-1]
+        route = self.get(*__key)
+        if route is None:
+            raise KeyError(__key)
+        return list(route)
 
     def __len__(self) -> int:
-        return len(self.__data)
+        return sum(1 for hop in self.next_hops if hop >= 0) // 2
+
+    def _walk(self, i: int, j: int) -> Iterator[Place]:
+        places = self.places
+        next_hops = self.next_hops
+        size = len(places)
+        if i == j:
+            return
+        hop = next_hops[i * size + j]
+        while hop != j:
+            yield places[hop]
+            hop = next_hops[hop * size + j]
@@ -1,6 +1,10 @@
-from typing import Optional
+from collections import OrderedDict
+from itertools import chain, pairwise
+from typing import Iterable, Iterator, Optional
 
-from recomm_town.town.place import Place, Way
+from recomm_town.town.place import Place, PlaceFunction, Way
+from recomm_town.town.place_index import PlaceIndex
+from recomm_town.town.polyline import Polyline
 from recomm_town.town.routes import Routes
 from recomm_town.town.routes_factory import RoutesFactory
 from recomm_town.common import Vec
@@ -10,11 +14,24 @@ class Town:
     places: list[Place]
     path: dict[tuple[Place, Place], Way]
     routes: Routes
+    place_index: PlaceIndex
+    components: dict[Place, int]
+    places_by_function: dict[tuple[int, PlaceFunction], list[Place]]
+    polyline_cache_size: int
+    _polylines: OrderedDict[tuple[Place, Place], Polyline | None]
 
-    def __init__(self, places: list[Place]):
+    def __init__(self, places: list[Place], polyline_cache_size: int = 4096):
         self.places = places
         self.path = self.__create_ways_between_places(places)
         self.routes = RoutesFactory(places).make()
+        self.place_index = PlaceIndex(places)
+        self.components = self.__find_components(places)
+        self.places_by_function = {}
+        for place in places:
+            key = (self.components[place], place.function)
+            self.places_by_function.setdefault(key, []).append(place)
+        self.polyline_cache_size = polyline_cache_size
+        self._polylines = OrderedDict()
         self.boundaries = (
             Vec(
                 min(p.boundaries[0].x for p in places),
@@ -37,6 +54,22 @@ class Town:
                 path.update(self.__create_ways(place, neighbor))
         return path
 
+    def __find_components(self, places: list[Place]) -> dict[Place, int]:
+        components: dict[Place, int] = {}
+        component = -1
+        for place in places:
+            if place in components:
+                continue
+            component += 1
+            stack = [place]
+            components[place] = component
+            while stack:
+                for neighbor in stack.pop().neighborhood:
+                    if neighbor not in components:
+                        components[neighbor] = component
+                        stack.append(neighbor)
+        return components
+
     def __create_ways(self, a: Place, b: Place) -> dict[tuple[Place, Place], Way]:
         ap = a.position
         bp = b.position
@@ -51,13 +84,54 @@ class Town:
         }
 
     def find_nearest_place(self, position: Vec) -> Place:
-        return min(
-            self.places,
-            key=lambda place: (place.position - position).length_squared(),
-        )
+        return self.place_index.nearest(position)
+
+    def find_reachable_places(
+        self, place_from: Place, function: PlaceFunction
+    ) -> list[Place]:
+        key = (self.components[place_from], function)
+        return self.places_by_function.get(key, [])
 
-    def find_route(self, place_from: Place, place_to: Place) -> Optional[list[Place]]:
+    def find_nearest_places(self, position: Vec, k: int) -> list[Place]:
+        return self.place_index.k_nearest(position, k)
+
+    def find_nearest_place_for_each(self, positions: Iterable[Vec]) -> list[Place]:
+        return self.place_index.many_nearest(positions)
+
+    def find_route(
+        self, place_from: Place, place_to: Place
+    ) -> Optional[Iterator[Place]]:
         if place_from is place_to:
-            return []
+            return iter(())
         route = self.routes.get(place_from, place_to)
-        return route and [place_from, *route, place_to]
+        return route and chain((place_from,), route, (place_to,))
+
+    def find_polyline(self, place_from: Place, place_to: Place) -> Optional[Polyline]:
+        key = (place_from, place_to)
+        try:
+            polyline = self._polylines[key]
+        except KeyError:
+            pass
+        else:
+            self._polylines.move_to_end(key)
+            return polyline
+
+        polyline = self.__make_polyline(place_from, place_to)
+        self._polylines[key] = polyline
+        if len(self._polylines) > self.polyline_cache_size:
+            self._polylines.popitem(last=False)
+        return polyline
+
+    def __make_polyline(self, place_from: Place, place_to: Place) -> Optional[Polyline]:
+        route = self.find_route(place_from, place_to)
+        if route is None:
+            return None
+        polyline = Polyline()
+        for place, next_place in pairwise(route):
+            way = self.path.get((place, next_place))
+            if not way:
+                polyline.append(place.position)
+            polyline.stops.append((len(polyline), place))
+            if way:
+                polyline.extend(way.points)
+        return polyline
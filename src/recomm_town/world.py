@@ -1,17 +1,27 @@
 from collections import defaultdict
 from dataclasses import dataclass
 from functools import partial
+from heapq import heapify, heappop
 from itertools import chain
-from random import choice, randint, random
+from random import Random
+from typing import TYPE_CHECKING, Iterator
 
+from recomm_town.clock import SimulationClock
 from recomm_town.common import Trivia, TriviaChunk, Vec
 from recomm_town.human import Activity, Emotion, Human
+from recomm_town.neighbor_grid import NeighborGrid
+from recomm_town.observer import Observer
+from recomm_town.profiler import TickProfiler
 from recomm_town.program import Program
 from recomm_town.town import Town, Place, Room, PlaceFunction as PF
 from recomm_town.actions import Action
 from recomm_town import actions
 from recomm_town.town.place import Invite
 
+if TYPE_CHECKING:
+    from recomm_town.engine import ArrayEngine
+    from recomm_town.knowledge import KnowledgeDecay, KnowledgeMatrix
+
 
 @dataclass(frozen=True)
 class WorldLevels:
@@ -27,17 +37,22 @@ class WorldLevels:
 
 
 class World:
-    NEIGHBOR_CELLS = [(x, y) for x in range(-1, 2) for y in range(-1, 2)]
-
     town: Town
     invites: list[Invite]
     people: list[Human]
     tracked_human: Human | None
+    clock: SimulationClock
+    rng: Random
     simulation_speed: float
-    people_grid: dict[tuple[int, int], set[Human]]
+    people_grid: NeighborGrid
     radio_program: Program
     tv_program: Program
     forget_lifetime: float
+    profiler: TickProfiler | None
+    engine: "ArrayEngine | None"
+    knowledge: "KnowledgeMatrix | None"
+    knowledge_decay: "KnowledgeDecay | None"
+    forgetting_observers: Observer[dict[Trivia, float]]
 
     def __init__(
         self,
@@ -47,91 +62,172 @@ class World:
         radio_program: Program,
         tv_program: Program,
         levels: WorldLevels,
+        clock: SimulationClock | None = None,
+        rng: Random | None = None,
     ):
         self.town = town
         self.invites = invites
         self.people = people
+        self.clock = clock or SimulationClock()
+        self.rng = rng or Random()
         self.simulation_speed = 1.0
-        self.people_grid = defaultdict(set)
+        self.people_grid = NeighborGrid(levels.neighbor_range, Activity)
         self.radio_program = radio_program
         self.tv_program = tv_program
         self.levels = levels
         self.forget_lifetime = self.levels.forgetting_tick
         self.warmup_lifetime = self.levels.warmup_time
+        self.profiler = None
+        self.engine = None
+        self.knowledge = None
+        self.knowledge_decay = None
+        self.forgetting_observers = Observer()
 
         for human in people:
-            self._update_human_coords(human, human.position)
+            self._check_reachable(human)
+            self.people_grid.add(human)
+            human.levels.clock = self.clock
             human.position_observers["world"] = self._update_human_coords
+            human.activity_observers["world"] = partial(
+                self.people_grid.set_activity, human
+            )
+
+    def _check_reachable(self, human: Human):
+        town = self.town
+        home = human.info.liveplace
+        if town.find_route(home, human.info.workplace) is None:
+            raise RuntimeError(f"{human.info.name} cannot get from home to work")
+        for func in (PF.SHOP, PF.ENTERTAIMENT):
+            if not town.find_reachable_places(home, func):
+                raise RuntimeError(f"no {func.name} reachable from {home.name}")
 
     def do_it(self, dt: float):
-        dt *= self.simulation_speed
+        for step in self.clock.steps(dt * self.simulation_speed):
+            self.step(step)
+
+    def step(self, dt: float):
         if not self.is_after_warmup:
             self.warmup_lifetime -= dt
+
+        profiler = self.profiler
+        if profiler is None:
+            self._step_programs(dt)
+            self._step_invites(dt)
+            self._step_people(dt)
+            self._step_forgetting(dt)
+        else:
+            profiler.measure("programs", self._step_programs, dt)
+            profiler.measure("invites", self._step_invites, dt)
+            profiler.measure("humans", self._step_people, dt)
+            profiler.measure("forgetting", self._step_forgetting, dt)
+            profiler.end_tick()
+        self.clock.tick()
+
+    def _step_programs(self, dt: float):
         self.radio_program.do_it(dt)
         self.tv_program.do_it(dt)
 
+    def _step_invites(self, dt: float):
         for invite in self.invites:
             invite.do_it(dt)
 
-        for human in self.people:
-            self._do_it_human(human, dt)
+    def _step_people(self, dt: float):
+        engine = self.engine
+        if engine is None:
+            for human in self.people:
+                self._do_it_human(human, dt)
+            return
+
+        people = self.people
+        for index in engine.idle_indices():
+            human = people[index]
+            self._plan_if_needed(human)
+            if not engine.adopt(index, human, human.actions[0]):
+                self._do_it_human(human, dt)
+
+        for index in engine.step(dt):
+            self._next_action(people[index])
 
+    def _step_forgetting(self, dt: float):
         self.forget_lifetime -= dt
         if self.forget_lifetime < 0.0:
             self.forget_lifetime = self.levels.forgetting_tick
-            human = choice(self.people)
-            self._forget_trivias(human)
+            self._forget_trivias()
 
-    def _update_human_coords(self, human: Human, old_position):
-        cell_size = self.levels.neighbor_range
-        old_x = int(old_position.x / cell_size)
-        old_y = int(old_position.y / cell_size)
+    def _update_human_coords(self, human: Human, old_position: Vec):
+        self.people_grid.update(human)
 
-        new_x = int(human.position.x / cell_size)
-        new_y = int(human.position.y / cell_size)
-
-        if (old_x, old_y) == (new_x, new_y):
-            # not changed.
-            return
+    def activity_histogram(self) -> dict[Activity, int]:
+        if self.engine is not None:
+            return self.engine.activity_counts()
+        counts = self.people_grid.counts
+        return {activity: counts[activity] for activity in Activity}
 
-        # remove old position
-        for x, y in self.NEIGHBOR_CELLS:
-            self.people_grid[old_x + x, old_y + y].discard(human)
-
-        # add new position
-        for x, y in self.NEIGHBOR_CELLS:
-            self.people_grid[new_x + x, new_y + y].add(human)
-
-    def _find_neighbours(self, human: Human) -> set[Human]:
-        cell_size = self.levels.neighbor_range
-        new_x = int(human.position.x / cell_size)
-        new_y = int(human.position.y / cell_size)
-        neighbors = set()
-        for x, y in self.NEIGHBOR_CELLS:
-            neighbors |= self.people_grid[new_x + x, new_y + y]
-        return neighbors - {human}
-
-    def _forget_trivias(self, human: Human):
-        factor = self.levels.forgetting_factor
-        count = len(human.knowledge)
-        forgetting_level = factor * count * self.levels.forgetting_tick
-        human.forget_trivias(forgetting_level)
+    def find_neighbours(
+        self,
+        human: Human,
+        radius: float | None = None,
+        k: int | None = None,
+        activity: Activity | None = None,
+    ) -> Iterator[Human]:
+        # the most trusted first. Heap instead of a full sort - a talk
+        # usually stops at one of the first few.
+        trust = human.get_trust_level
+        near = self.people_grid.near(human.position, radius, activity)
+        heap = [
+            (-trust(other), index, other)
+            for index, other in enumerate(near)
+            if other is not human
+        ]
+        heapify(heap)
+        for _ in range(len(heap) if k is None else min(k, len(heap))):
+            yield heappop(heap)[2]
+
+    def _forget_trivias(self):
+        # everyone forgets on every tick, observers get one batch of
+        # summed changes per trivia. Spread over the population, the rate is
+        # the same as one random human forgetting the whole dose per tick.
+        levels = self.levels
+        level = levels.forgetting_factor * levels.forgetting_tick / len(self.people)
+        if self.knowledge_decay is not None:
+            # already forgotten on read, only the observers are left
+            diffs = self.knowledge_decay.forgotten()
+        elif self.knowledge is not None:
+            diffs = self.knowledge.forget(level)
+        else:
+            diffs = defaultdict(float)
+            for human in self.people:
+                count = len(human.knowledge)
+                for trivia, diff in human.forget_trivias(level * count).items():
+                    diffs[trivia] += diff
+        # called even without changes - totals sampled on the tick stay regular
+        self.forgetting_observers(diffs)
 
     def _do_it_human(self, human: Human, dt: float):
-        while not human.actions:
-            human.actions = self._make_new_actions(human)
-
+        self._plan_if_needed(human)
         result = human.actions[0].do_it(human, dt)
         match result:
             case "NEXT":
-                action = human.actions.pop(0)
-                action.on_destroy(human)
+                self._next_action(human)
             case "FAIL":
                 for action in human.actions:
                     action.on_destroy(human)
 
                 human.actions.clear()
 
+    def _plan_if_needed(self, human: Human):
+        while not human.actions:
+            if self.profiler is None:
+                human.actions.extend(self._make_new_actions(human))
+            else:
+                human.actions.extend(
+                    self.profiler.measure("plan", self._make_new_actions, human)
+                )
+
+    def _next_action(self, human: Human):
+        action = human.actions.popleft()
+        action.on_destroy(human)
+
     def _make_new_actions(self, human: Human) -> list[Action]:
         if human.place_order:
             place = human.place_order
@@ -140,11 +236,11 @@ class World:
                 human=human,
                 activity=Activity.IDEA,
                 place=place,
-                time=randint(20, 30),
+                time=self.rng.randint(20, 30),
                 talk_probablity=1.0,
                 levels={
-                    "money": +0.5 + random() * 0.3,
-                    "satiety": -0.5 + random() * 0.3,
+                    "money": +0.5 + self.rng.random() * 0.3,
+                    "satiety": -0.5 + self.rng.random() * 0.3,
                 },
             )
         match human.measure_emotion():
@@ -153,32 +249,32 @@ class World:
                     human=human,
                     activity=Activity.WORK,
                     place=human.info.workplace,
-                    time=randint(20, 30),
+                    time=self.rng.randint(20, 30),
                     talk_probablity=0.5,
                     levels={
-                        "money": +0.5 + random() * 0.3,
-                        "energy": -0.5 - random() * 0.2,
-                        "satiety": -0.5 + random() * 0.3,
+                        "money": +0.5 + self.rng.random() * 0.3,
+                        "energy": -0.5 - self.rng.random() * 0.2,
+                        "satiety": -0.5 + self.rng.random() * 0.3,
                     },
                 )
             case Emotion.EMPTY_FRIDGE:
                 place = self._find_place_by_function(human, PF.SHOP)
                 end_actions: list[Action]
-                if place.books and random() > 0.3:
-                    end_actions = [actions.BuyBook(choice(place.books))]
+                if place.books and self.rng.random() > 0.3:
+                    end_actions = [actions.BuyBook(self.rng.choice(place.books))]
                 else:
                     end_actions = []
                 return self._go_to_place(
                     human=human,
                     activity=Activity.SHOP,
                     place=place,
-                    time=randint(5, 10),
+                    time=self.rng.randint(5, 10),
                     talk_probablity=0.1,
                     levels={
-                        "fridge": 1.0 - random() * 0.2,
-                        "money": -0.3 - random() * 0.1,
-                        "energy": -0.2 - random() * 0.1,
-                        "satiety": -0.1 - random() * 0.1,
+                        "fridge": 1.0 - self.rng.random() * 0.2,
+                        "money": -0.3 - self.rng.random() * 0.1,
+                        "energy": -0.2 - self.rng.random() * 0.1,
+                        "satiety": -0.1 - self.rng.random() * 0.1,
                     },
                     end_actions=end_actions,
                 )
@@ -186,20 +282,20 @@ class World:
                 return self._go_home(
                     human=human,
                     activity=Activity.EAT,
-                    time=randint(5, 10),
+                    time=self.rng.randint(5, 10),
                     levels={
-                        "fridge": -0.4 - random() * 0.2,
-                        "satiety": 1.0 - random() * 0.2,
-                        "energy": -0.1 - random() * 0.1,
+                        "fridge": -0.4 - self.rng.random() * 0.2,
+                        "satiety": 1.0 - self.rng.random() * 0.2,
+                        "energy": -0.1 - self.rng.random() * 0.1,
                     },
                 )
             case Emotion.TIRED:
                 return self._go_home(
                     human=human,
                     activity=Activity.SLEEP,
-                    time=randint(10, 20),
+                    time=self.rng.randint(10, 20),
                     levels={
-                        "satiety": -0.4 - random() * 0.2,
+                        "satiety": -0.4 - self.rng.random() * 0.2,
                         "energy": 1.0,
                     },
                 )
@@ -212,7 +308,9 @@ class World:
                         else self._go_home_learn(
                             human=human,
                             activity=Activity.READ,
-                            trivia=self._choice_chunk(choice(human.library).trivia),
+                            trivia=self._choice_chunk(
+                                self.rng.choice(human.library).trivia
+                            ),
                             learn_level=self.levels.reading,
                             max_level=0.8,
                         )
@@ -237,24 +335,24 @@ class World:
                 filtered_possibilities = [p for p in possibilities if p is not None]
                 if not filtered_possibilities:
                     return self._make_fail()
-                return choice(filtered_possibilities)
+                return self.rng.choice(filtered_possibilities)
 
     def _go_fun_fun(self, human: Human) -> list[Action]:
         place = self._find_place_by_function(human, PF.ENTERTAIMENT)
         end_actions: list[Action]
-        if place.books and random() > 0.8:
-            end_actions = [actions.BuyBook(choice(place.books))]
+        if place.books and self.rng.random() > 0.8:
+            end_actions = [actions.BuyBook(self.rng.choice(place.books))]
         else:
             end_actions = []
         return self._go_to_place(
             human=human,
             activity=Activity.ENJOY,
             place=place,
-            time=randint(5, 10),
+            time=self.rng.randint(5, 10),
             levels={
-                "money": -0.1 - random() * 0.2,
-                "energy": -0.2 - random() * 0.2,
-                "satiety": -0.3 - random() * 0.2,
+                "money": -0.1 - self.rng.random() * 0.2,
+                "energy": -0.2 - self.rng.random() * 0.2,
+                "satiety": -0.3 - self.rng.random() * 0.2,
             },
             end_actions=end_actions,
         )
@@ -268,15 +366,15 @@ class World:
         end_actions: list[Action] | None = None,
     ) -> list[Action]:
         if isinstance(activity, list):
-            activity = choice(activity)
+            activity = self.rng.choice(activity)
         return [
-            actions.ChangeActivity(Activity.MOVE),
+            actions.change_activity(Activity.MOVE),
             *self._make_move_action_to_place(human, human.info.liveplace),
             *self._make_move_action_to_room(human.info.liveroom),
-            actions.ChangeActivity(activity),
+            actions.change_activity(activity),
             actions.UpdateLevelsInTime(time, levels),
             *(end_actions or []),
-            actions.ChangeActivity(Activity.MOVE),
+            actions.change_activity(Activity.MOVE),
             *self._make_move_action_from_room(human.info.liveroom),
         ]
 
@@ -291,10 +389,10 @@ class World:
         return self._go_home(
             human=human,
             activity=activity,
-            time=randint(5, 10),
+            time=self.rng.randint(5, 10),
             levels={
-                "satiety": -0.1 - random() * 0.2,
-                "energy": +0.3 + random() * 0.2,
+                "satiety": -0.1 - self.rng.random() * 0.2,
+                "energy": +0.3 + self.rng.random() * 0.2,
             },
             end_actions=[
                 actions.LearnTrivia(
@@ -317,23 +415,30 @@ class World:
     ) -> list[Action]:
         talk_probablity *= self.levels.talking
         if isinstance(activity, list):
-            activity = choice(activity)
+            activity = self.rng.choice(activity)
         room = self._find_available_room(place)
         if room is None:
             return self._make_fail()
 
-        parts = randint(4, 8)
+        parts = self.rng.randint(4, 8)
         ratio = 1 / parts
-        learn_level = self.levels.learning * ratio * (0.5 + random() * 0.5)
-        find = partial(self._find_neighbours, human)
+        learn_level = self.levels.learning * ratio * (0.5 + self.rng.random() * 0.5)
+        find = partial(
+            self.find_neighbours,
+            human,
+            radius=self.levels.neighbor_range,
+            activity=Activity.TALK,
+        )
 
         def part_callback():
             acts: list[Action] = [actions.UpdateLevelsInTime(time, levels, ratio)]
             if self.is_after_warmup:
-                talk_time = randint(2, 5)
+                talk_time = self.rng.randint(2, 5)
                 teaching_level = self.levels.teaching
                 acts.append(
-                    actions.RandomTalk(talk_time, find, talk_probablity, teaching_level)
+                    actions.RandomTalk(
+                        talk_time, find, self.rng, talk_probablity, teaching_level
+                    )
                 )
             if place.learn_trivias:
                 acts.append(
@@ -349,100 +454,94 @@ class World:
         main_actions = chain.from_iterable(part_callback() for i in range(parts))
         return [
             actions.TakeRoom(place, room),
-            actions.ChangeActivity(Activity.MOVE),
+            actions.change_activity(Activity.MOVE),
             *self._make_move_action_to_place(human, place),
             *self._make_move_action_to_room(room),
-            actions.ChangeActivity(activity),
+            actions.change_activity(activity),
             *main_actions,
             *(end_actions or []),
-            actions.ChangeActivity(Activity.MOVE),
+            actions.change_activity(Activity.MOVE),
             *self._make_move_action_from_room(room),
-            actions.FreeRoom(room),
+            actions.FreeRoom(place, room),
         ]
 
     @property
     def is_after_warmup(self):
         return self.warmup_lifetime <= 0.0
 
-    @classmethod
-    def _choice_trivia(cls, trivias: list[Trivia]) -> TriviaChunk:
-        return cls._choice_chunk(choice(trivias))
+    def _choice_trivia(self, trivias: list[Trivia]) -> TriviaChunk:
+        return self._choice_chunk(self.rng.choice(trivias))
 
-    @staticmethod
-    def _choice_chunk(trivia: Trivia) -> TriviaChunk:
-        return trivia.get_chunk(randint(0, trivia.chunks - 1))
+    def _choice_chunk(self, trivia: Trivia) -> TriviaChunk:
+        return trivia.get_chunk(self.rng.randint(0, trivia.chunks - 1))
 
     def _make_fail(self):
-        return [actions.ChangeActivity(Activity.WTF), actions.Wait(randint(2, 5))]
+        return [
+            actions.change_activity(Activity.WTF),
+            actions.Wait(self.rng.randint(2, 5)),
+        ]
 
     def _make_move_action_to_place(self, human: Human, place_to: Place) -> list[Action]:
         place_from = self.town.find_nearest_place(human.position)
-        route = self.town.find_route(place_from, place_to)
-        if route is None:
+        polyline = self.town.find_polyline(place_from, place_to)
+        if polyline is None:
             raise RuntimeError("???")
         acts: list[Action] = []
-        for i in range(len(route) - 1):
-            place = route[i]
-            next_place = route[i + 1]
-            way = self.town.path.get((place, next_place))
-            if not way:
-                acts.append(actions.Move(place.position))
-
-            if place.function == PF.CROSSROAD and random() > 0.9:
+        start = 0
+        for index, place in polyline.stops:
+            if place.function == PF.CROSSROAD and self.rng.random() > 0.9:
+                if index > start:
+                    acts.append(actions.MoveAlong(polyline, start, index))
+                    start = index
                 acts += self._wait_at_crossroad(human, place)
-
-            if way:
-                acts += [actions.Move(p) for p in way.points]
+        if len(polyline) > start:
+            acts.append(actions.MoveAlong(polyline, start))
         return acts
 
     def _wait_at_crossroad(self, human: Human, place: Place):
         acts: list[Action] = []
         size = place.box_start - place.box_end  # TODO - use rotation argument
-        local = Vec(size.x * (random() - 0.5), size.y * (random() - 0.5))
-        find = partial(self._find_neighbours, human)
+        local = Vec(
+            size.x * (self.rng.random() - 0.5), size.y * (self.rng.random() - 0.5)
+        )
+        find = partial(
+            self.find_neighbours,
+            human,
+            radius=self.levels.neighbor_range,
+            activity=Activity.TALK,
+        )
         acts += [
             actions.Move(place.position + local),
-            actions.ChangeActivity(Activity.TIME_BREAK),
-            actions.Wait(random() * 2.0),
+            actions.change_activity(Activity.TIME_BREAK),
+            actions.Wait(self.rng.random() * 2.0),
         ]
         if self.is_after_warmup:
             teaching_level = self.levels.teaching
             talk_prob = 0.9 * self.levels.talking
-            for _ in range(randint(1, 4)):
-                talk_time = randint(10, 15) / 10.0
+            for _ in range(self.rng.randint(1, 4)):
+                talk_time = self.rng.randint(10, 15) / 10.0
                 acts += [
-                    actions.RandomTalk(talk_time, find, talk_prob, teaching_level),
-                    actions.Wait(random() * 2.0),
+                    actions.RandomTalk(
+                        talk_time, find, self.rng, talk_prob, teaching_level
+                    ),
+                    actions.Wait(self.rng.random() * 2.0),
                 ]
 
         acts += [
-            actions.ChangeActivity(Activity.MOVE),
+            actions.change_activity(Activity.MOVE),
             actions.Move(place.position),
         ]
         return acts
 
     def _make_move_action_to_room(self, room: Room) -> list[Action]:
-        act: list[Action] = [actions.Move(vec) for vec in room.path]
-        return act + [actions.Move(room.position)]
+        return [actions.MoveAlong([*room.path, room.position])]
 
     def _make_move_action_from_room(self, room: Room) -> list[Action]:
-        act: list[Action] = [actions.Move(vec) for vec in room.path[::-1]]
-        return [actions.Move(room.position)] + act
+        return [actions.MoveAlong([room.position, *room.path[::-1]])]
 
     def _find_place_by_function(self, human: Human, func: PF) -> Place:
         place_from = self.town.find_nearest_place(human.position)
-        while True:
-            place_to = choice(self.town.places)
-            if place_to.function != func:
-                continue
-            route = self.town.find_route(place_from, place_to)
-            if route is None:
-                continue
-            break
-        return place_to
+        return self.rng.choice(self.town.find_reachable_places(place_from, func))
 
     def _find_available_room(self, place: Place) -> Room | None:
-        available_rooms = [
-            room for room in place.rooms if not room.owner and not room.occupied_by
-        ]
-        return choice(available_rooms) if available_rooms else None
+        return place.find_free_room(self.rng)